@@ -36,6 +36,9 @@ class _ChatPageState extends State<ChatPage> {
   // 상태 변수 맵 (예: name 등)
   final Map<String, dynamic> _appState = {};
 
+  // 마지막으로 반영한 서버 상태 버전 (이보다 오래된 patch는 무시)
+  int _stateVersion = 0;
+
   // 서버에서 받은 최신 카드/윈도우 상태
   Map<String, dynamic>? _latestWindow;
   final Map<String, Map<String, dynamic>> _latestCards = {};
@@ -331,6 +334,8 @@ class _ChatPageState extends State<ChatPage> {
 
   StreamSubscription<String>? _streamSub;
   http.Client? _httpClient;
+  String? _lastEventId; // 마지막으로 받은 SSE 이벤트 ID (재연결 시 Last-Event-ID로 전송)
+  bool _disposed = false;
 
   @override
   void initState() {
@@ -355,12 +360,34 @@ class _ChatPageState extends State<ChatPage> {
   void _startAgentStream() async {
     final url = Uri.parse('${AppConfig.serverUrl}/stream/${widget.sessionId}');
     final request = http.Request('GET', url);
-    final response = await _httpClient!.send(request);
+    // 재연결이면 마지막으로 받은 이벤트 다음부터 이어받기
+    if (_lastEventId != null) {
+      request.headers['Last-Event-ID'] = _lastEventId!;
+    }
+    final http.StreamedResponse response;
+    try {
+      response = await _httpClient!.send(request);
+    } catch (e) {
+      debugPrint('[Agent Stream] Connection error: $e');
+      _reconnectAgentStream();
+      return;
+    }
+    if (response.statusCode != 200) {
+      debugPrint('[Agent Stream] Stream closed: ${response.statusCode}');
+      return;
+    }
     _streamSub = response.stream
         .transform(utf8.decoder)
         .transform(const LineSplitter())
         .listen((line) {
-          final msg = line.trim();
+          // SSE: ":"로 시작하면 heartbeat 주석, "id:"는 이벤트 ID, "data:"가 메시지
+          if (line.startsWith(':')) return;
+          if (line.startsWith('id:')) {
+            _lastEventId = line.substring(3).trim();
+            return;
+          }
+          final msg = (line.startsWith('data:') ? line.substring(5) : line)
+              .trim();
           if (msg.isNotEmpty) {
             debugPrint('[Agent Stream] Received: $msg');
             ChatMessage? chatMsg;
@@ -378,9 +405,23 @@ class _ChatPageState extends State<ChatPage> {
                   setState(() {
                     _appState.addAll(state);
                   });
+                  if (parsed['version'] is int) {
+                    _stateVersion = parsed['version'];
+                  }
                   isStateMsg = true;
                 }
               }
+              // 상태 patch(JSON Patch) 메시지 처리: 이미 반영된 버전이면 건너뜀
+              if (parsed is Map && parsed.containsKey('patch')) {
+                final version = parsed['version'];
+                if (version is int && version > _stateVersion) {
+                  setState(() {
+                    _applyPatch(_appState, parsed['patch']);
+                  });
+                  _stateVersion = version;
+                }
+                isStateMsg = true;
+              }
               // window 키워드가 있으면 정보 윈도우로 사용
               if (!isStateMsg &&
                   parsed is Map &&
@@ -447,7 +488,59 @@ class _ChatPageState extends State<ChatPage> {
               });
             }
           }
-        });
+        },
+        onDone: _reconnectAgentStream,
+        onError: (e) {
+          debugPrint('[Agent Stream] Stream error: $e');
+          _reconnectAgentStream();
+        },
+        cancelOnError: true);
+  }
+
+  // 연결이 끊기면 잠시 후 다시 연결 (서버가 Last-Event-ID 이후 이벤트를 재전송)
+  void _reconnectAgentStream() {
+    if (_disposed) return;
+    Future.delayed(const Duration(seconds: 2), () {
+      if (!_disposed) _startAgentStream();
+    });
+  }
+
+  // JSON Patch(RFC 6902)의 add/remove/replace 연산을 상태에 적용
+  void _applyPatch(Map<String, dynamic> target, dynamic patch) {
+    if (patch is! List) return;
+    for (final op in patch) {
+      if (op is! Map || op['path'] is! String) continue;
+      final path = (op['path'] as String)
+          .split('/')
+          .skip(1)
+          .map((p) => p.replaceAll('~1', '/').replaceAll('~0', '~'))
+          .toList();
+      if (path.isEmpty) continue;
+
+      dynamic parent = target;
+      for (final key in path.sublist(0, path.length - 1)) {
+        parent = parent is List ? parent[int.parse(key)] : parent[key];
+      }
+
+      final last = path.last;
+      if (parent is List) {
+        if (op['op'] == 'remove') {
+          parent.removeAt(int.parse(last));
+        } else if (last == '-') {
+          parent.add(op['value']);
+        } else if (op['op'] == 'add') {
+          parent.insert(int.parse(last), op['value']);
+        } else {
+          parent[int.parse(last)] = op['value'];
+        }
+      } else if (parent is Map) {
+        if (op['op'] == 'remove') {
+          parent.remove(last);
+        } else {
+          parent[last] = op['value'];
+        }
+      }
+    }
   }
 
   // card/window 내 text 위젯의 {var} 패턴을 찾아 _appState에 없으면 null로 초기화
@@ -517,6 +610,7 @@ class _ChatPageState extends State<ChatPage> {
 
   @override
   void dispose() {
+    _disposed = true;
     _streamSub?.cancel();
     _httpClient?.close();
     super.dispose();
@@ -1 +1,8 @@
-from . import agent
\ No newline at end of file
+import importlib
+
+# adk web / adk run load the root agent as agent.agent.root_agent. It is imported on first access, so scripts that
+# only use modules of this package (the benchmarks) do not build the ADK agents and the search stack.
+def __getattr__(name):
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,91 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent encode requests into batched model calls on one worker thread.
+
+    The worker takes the first queued request, then keeps collecting requests for up to max_wait_ms
+    (or until max_batch_size requests), encodes them in a single call and hands each caller its vector.
+    Identical texts within a batch are encoded once.
+
+    Args:
+        encode_batch (Callable[[list[str]], list[list[float]]]): Encodes a batch of texts.
+        max_batch_size (int): Maximum number of texts per model call.
+        max_wait_ms (float): How long the first request of a batch may wait for others. 0 batches only what is already queued.
+    """
+
+    def __init__(self, encode_batch, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self._encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self.batches = 0
+        self.items = 0
+        self.max_batch = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self._stats_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, time.perf_counter(), future))
+        return future
+
+    def encode(self, text: str) -> list[float]:
+        """Blocks until the batch containing text has been encoded."""
+        return self.submit(text).result()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch,
+                "mean_queue_wait_ms": 1000 * self.total_queue_wait / self.items if self.items else 0.0,
+                "max_queue_wait_ms": 1000 * self.max_queue_wait,
+            }
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = batch[0][1] + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+
+            texts = list(dict.fromkeys(text for text, _, _ in batch))
+            try:
+                vectors = dict(zip(texts, self._encode_batch(texts)))
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for text, _, future in batch:
+                future.set_result(list(vectors[text]))
+
+            waits = [started - enqueued for _, enqueued, _ in batch]
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.max_batch = max(self.max_batch, len(batch))
+                self.total_queue_wait += sum(waits)
+                self.max_queue_wait = max(self.max_queue_wait, max(waits))
@@ -0,0 +1,135 @@
+import asyncio
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query so that phrasings differing only in case or whitespace share one cache entry.
+    """
+    return " ".join(query.casefold().split())
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings, optionally backed by a SQLite file that survives restarts.
+
+    Args:
+        encode (Callable[[str], list[float]]): Encodes a (normalized) query into a vector.
+        maxsize (int): Maximum number of vectors kept in memory. The least recently used entry is evicted first.
+        path (str, optional): SQLite file used as a persistent second level. In-memory only if None.
+        namespace (str): Key prefix on disk (e.g., the model name) so vectors of different models never mix.
+    """
+
+    def __init__(self, encode, maxsize: int = 1024, path: str | None = None, namespace: str = ""):
+        self._encode = encode
+        self.maxsize = maxsize
+        self.namespace = namespace
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "namespace TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, query))"
+            )
+            self._db.commit()
+
+    def get(self, query: str) -> list[float]:
+        key = normalize_query(query)
+
+        vector = self._lookup(key)
+        if vector is not None:
+            return vector
+
+        vector = self._load(key)
+        if vector is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            # Encode outside the lock so that a slow encode does not block cache hits.
+            vector = list(self._encode(key))
+            with self._lock:
+                self.misses += 1
+            self._save(key, vector)
+
+        self._put(key, vector)
+        return vector
+
+    async def aget(self, query: str, executor=None) -> list[float]:
+        """
+        Like get, but a cache miss is encoded (and the disk store read) on executor, so the event loop is never blocked.
+        """
+        vector = self._lookup(normalize_query(query))
+        if vector is not None:
+            return vector
+
+        return await asyncio.get_running_loop().run_in_executor(executor, self.get, query)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def _lookup(self, key: str) -> list[float] | None:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def _put(self, key: str, vector: list[float]):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> list[float] | None:
+        if self._db is None:
+            return None
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT vector FROM embeddings WHERE namespace = ? AND query = ?",
+                (self.namespace, key)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector.tolist()
+
+    def _save(self, key: str, vector: list[float]):
+        if self._db is None:
+            return
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (namespace, query, vector) VALUES (?, ?, ?)",
+                (self.namespace, key, array("f", vector).tobytes())
+            )
+            self._db.commit()
@@ -0,0 +1,55 @@
+import os
+
+# EMBEDDING_MODEL: the model the agents encode queries with, a Hugging Face name or a local export.
+# Kept in this module without side effects, so the benchmarks can read it without importing the agents.
+MODEL_NAME = os.environ.get("EMBEDDING_MODEL", "Qwen/Qwen3-Embedding-0.6B")
+
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+
+# File written by export_quantized_onnx, relative to the exported model directory.
+QUANTIZED_ONNX_FILE = "onnx/model_qint8_{config}.onnx"
+
+def load_embedding_model(name: str, backend: str = "torch", onnx_file: str | None = None):
+    """
+    Loads a SentenceTransformer for CPU inference with the given backend:
+        - "torch": the fp32 PyTorch model.
+        - "int8": the PyTorch model with its Linear layers dynamically quantized to int8.
+        - "onnx": ONNX Runtime. onnx_file selects an exported file inside the model directory
+          (e.g. "onnx/model_qint8_avx512_vnni.onnx" for an int8 export); the default export is fp32.
+
+    Args:
+        name (str): Hugging Face model name or local directory (e.g. one written by export_quantized_onnx).
+        backend (str): One of EMBEDDING_BACKENDS.
+        onnx_file (str, optional): ONNX file to load, relative to the model directory. Only used by "onnx".
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(name)
+
+    if backend == "int8":
+        import torch
+        model = SentenceTransformer(name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend == "onnx":
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        return SentenceTransformer(name, backend="onnx", model_kwargs=model_kwargs)
+
+    raise ValueError(f"Unknown embedding backend {backend!r} (expected one of {', '.join(EMBEDDING_BACKENDS)}).")
+
+def export_quantized_onnx(name: str, output_dir: str, config: str = "avx512_vnni") -> str:
+    """
+    Exports name to ONNX in output_dir and writes an int8 dynamically quantized copy next to it.
+    Returns the onnx_file to pass to load_embedding_model(output_dir, "onnx", onnx_file).
+
+    Args:
+        config (str): ONNX Runtime quantization target: "arm64", "avx2", "avx512" or "avx512_vnni".
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model = SentenceTransformer(name, backend="onnx")
+    model.save(output_dir)
+    export_dynamic_quantized_onnx_model(model, quantization_config=config, model_name_or_path=output_dir)
+
+    return QUANTIZED_ONNX_FILE.format(config=config)
@@ -0,0 +1,256 @@
+import os
+import json
+import difflib
+import threading
+from collections import Counter
+
+from .search_backend import default_data_dir, load_payload_schema, NEAR_RADIUS_KM
+
+# Array fields whose values come from a fixed vocabulary, computed from restaurant.json like yelp/data.py does.
+VOCABULARY_FIELDS = ("categories", "ambiences", "good_for_meals", "parkings")
+
+OPERATORS = {
+    "keyword": ("eq", "ne", "in", "out"),
+    "float": ("eq", "ne", "gt", "gte", "lt", "lte"),
+    "integer": ("eq", "ne", "gt", "gte", "lt", "lte"),
+    "bool": ("eq", "ne"),
+    "geo": ("near", "within"),
+}
+
+# Keys of a geo point and of a "near" condition, with the spellings the LLM tends to use instead.
+POINT_KEYS = ("lon", "lat")
+NEAR_KEYS = POINT_KEYS + ("radius_km", "weight")
+KEY_ALIASES = {"lng": "lon", "long": "lon", "longitude": "lon", "latitude": "lat", "radius": "radius_km", "distance_km": "radius_km"}
+
+TRUE_STRINGS = ("true", "yes", "1")
+FALSE_STRINGS = ("false", "no", "0")
+
+def load_vocabularies(data_dir: str) -> dict[str, Counter]:
+    """Returns {field: Counter of values} of the vocabulary fields over restaurant.json."""
+    with open(os.path.join(data_dir, "restaurant.json"), 'r', encoding='utf-8') as file:
+        restaurants = json.load(file)
+
+    vocabularies = {field: Counter() for field in VOCABULARY_FIELDS}
+    for restaurant in restaurants:
+        for field, counts in vocabularies.items():
+            value = restaurant.get(field, [])
+            counts.update(value if isinstance(value, list) else [value] if value else [])
+    return vocabularies
+
+class FilterSchema:
+    """
+    Typed view of the filter language of search_restaurants: the payload field types of payload_schema.json and
+    the allowed values of the vocabulary fields.
+
+    describe() renders it compactly for the tool description: the small vocabularies in full, categories as their
+    most frequent values only. normalize() validates a filter from the LLM against it and corrects near misses
+    (field names, operators, value types and vocabulary values, via difflib), so values the description leaves out
+    still filter accurately. A value that cannot be corrected raises ValueError naming the closest allowed values,
+    which the agent gets back as the tool error.
+
+    Args:
+        types (dict): {field: payload index type}, as in payload_schema.json.
+        vocabularies (dict): {field: Counter of values} for the vocabulary fields.
+        cutoff (float): Minimum difflib similarity of a correction.
+    """
+
+    def __init__(self, types: dict, vocabularies: dict, cutoff: float = 0.75):
+        self.types = types
+        self.vocabularies = vocabularies
+        self.cutoff = cutoff
+
+        self.corrections = 0
+        self.rejections = 0
+        self._folded = {field: {value.casefold(): value for value in counts} for field, counts in vocabularies.items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, data_dir: str = default_data_dir) -> "FilterSchema":
+        """Schema of the data in data_dir. Without restaurant.json, vocabulary values are not checked."""
+        try:
+            vocabularies = load_vocabularies(data_dir)
+        except FileNotFoundError:
+            vocabularies = {}
+        return cls(load_payload_schema(data_dir), vocabularies)
+
+    def describe(self, examples: int = 30) -> str:
+        """The filter fields, their types and allowed values, with at most examples values per vocabulary field."""
+        by_type = {}
+        for field, field_type in self.types.items():
+            if field not in self.vocabularies:
+                by_type.setdefault(field_type, []).append(field)
+
+        lines = []
+        for field_type, label in (("keyword", "string"), ("float", "number"), ("integer", "integer"), ("bool", "boolean")):
+            if by_type.get(field_type):
+                lines.append(f"{label} ({', '.join(OPERATORS[field_type])}): {', '.join(by_type[field_type])}")
+        if by_type.get("geo"):
+            lines.append(
+                f"geo (near, within): {', '.join(by_type['geo'])}; "
+                f'{{"near": {{"lon": .., "lat": .., "radius_km": {NEAR_RADIUS_KM:g}, "weight": 0.3}}}} keeps restaurants within radius_km, '
+                'a weight > 0 (up to 1) also ranks nearer ones higher; '
+                '{"within": {"top_left": {"lon": .., "lat": ..}, "bottom_right": {"lon": .., "lat": ..}}} keeps a box'
+            )
+        for field, counts in self.vocabularies.items():
+            if not counts:
+                continue
+            values = [value for value, _ in counts.most_common(examples)]
+            if len(values) < len(counts):
+                lines.append(f"{field} (in, out; any of {len(counts)} values, e.g. {', '.join(sorted(values))}; close names are corrected)")
+            else:
+                lines.append(f"{field} (in, out): {', '.join(sorted(values))}")
+        return "\n".join(lines)
+
+    def normalize(self, filter: dict | None) -> dict:
+        """
+        Returns filter with corrected field names, operators and values, in the {"field": {"op": value}} form.
+        Raises ValueError for what cannot be corrected.
+        """
+        normalized = {}
+        for field, cond in (filter or {}).items():
+            field = self._correct(field, self.types, "field")
+            field_type = self.types[field]
+
+            if not isinstance(cond, dict):
+                cond = {"in" if isinstance(cond, list) else "eq": cond}
+
+            ops = normalized.setdefault(field, {})
+            for op, value in cond.items():
+                if field_type == "geo":
+                    op = self._correct(op, OPERATORS["geo"], f"operator of {field} (a geo field)")
+                    ops[op] = self._near(field, value) if op == "near" else self._within(field, value)
+                    continue
+
+                operators = OPERATORS[field_type] + (("in", "out") if field in self.vocabularies else ())
+                op = self._correct(op, operators, f"operator of {field}")
+                if isinstance(value, list) and op in ("eq", "ne") and "in" in operators:
+                    # {"categories": {"eq": ["Italian", "Pizza"]}}: any of them
+                    op = "in" if op == "eq" else "out"
+                    self._count_correction()
+                if op in ("in", "out"):
+                    values = value if isinstance(value, list) else [value]
+                    ops[op] = list(dict.fromkeys(self._value(field, field_type, v) for v in values))
+                else:
+                    ops[op] = self._value(field, field_type, value)
+
+        return normalized
+
+    def _value(self, field: str, field_type: str, value):
+        if field_type in ("float", "integer"):
+            try:
+                number = value if isinstance(value, (int, float)) and not isinstance(value, bool) else float(value)
+            except (TypeError, ValueError):
+                self._reject()
+                raise ValueError(f"{field} expects a number, got {value!r}.")
+            if field_type == "float":
+                return float(number)
+            # "389" -> 389; a fractional bound such as {"gte": 3.5} on an integer field stays a float.
+            return int(number) if float(number).is_integer() else number
+
+        if field_type == "bool":
+            if isinstance(value, bool):
+                return value
+            if str(value).casefold() in TRUE_STRINGS + FALSE_STRINGS:
+                self._count_correction()
+                return str(value).casefold() in TRUE_STRINGS
+            self._reject()
+            raise ValueError(f"{field} expects true or false, got {value!r}.")
+
+        if not isinstance(value, (str, int, float)):
+            self._reject()
+            raise ValueError(f"{field} expects a single value, got {value!r}.")
+        if field in self.vocabularies and self.vocabularies[field]:
+            return self._vocabulary_value(field, value)
+        return value
+
+    def _near(self, field: str, value) -> dict:
+        near = self._point(field, self._keys(field, value, NEAR_KEYS, "near"), "near")
+        if near.get("radius_km", 1) <= 0 or not 0 <= near.get("weight", 0) <= 1:
+            self._reject()
+            raise ValueError(f"{field} near needs radius_km > 0 and a weight between 0 and 1.")
+        return near
+
+    def _within(self, field: str, value) -> dict:
+        box = self._keys(field, value, ("top_left", "bottom_right"), "within", numeric=False)
+        if len(box) != 2:
+            self._reject()
+            raise ValueError(f"{field} within needs top_left and bottom_right.")
+        box = {corner: self._point(field, self._keys(field, point, POINT_KEYS, corner), corner) for corner, point in box.items()}
+        if box["top_left"]["lat"] < box["bottom_right"]["lat"]:
+            self._reject()
+            raise ValueError(f"{field} within needs top_left north of bottom_right.")
+        return box
+
+    def _keys(self, field: str, value, allowed: tuple, what: str, numeric: bool = True) -> dict:
+        """value as a dict with corrected keys (and float values if numeric)."""
+        if not isinstance(value, dict):
+            self._reject()
+            raise ValueError(f"{field} {what} expects an object with {', '.join(allowed)}, got {value!r}.")
+
+        result = {}
+        for key, item in value.items():
+            key = str(key).casefold()
+            key = KEY_ALIASES.get(key, key)
+            key = self._correct(key, allowed, f"key of {field} {what}")
+            result[key] = self._value(f"{field} {what} {key}", "float", item) if numeric else item
+        return result
+
+    def _point(self, field: str, point: dict, what: str) -> dict:
+        """point ({"lon", "lat"} and maybe more keys) after checking that it has both coordinates, in range."""
+        if "lon" not in point or "lat" not in point:
+            self._reject()
+            raise ValueError(f"{field} {what} needs lon and lat.")
+        if not (-180 <= point["lon"] <= 180 and -90 <= point["lat"] <= 90):
+            self._reject()
+            raise ValueError(f"{field} coordinates out of range: {point}.")
+        return point
+
+    def _vocabulary_value(self, field: str, value):
+        counts = self.vocabularies[field]
+        if value in counts:
+            return value
+
+        folded = self._folded[field]
+        match = folded.get(str(value).casefold())
+        if match is None:
+            close = difflib.get_close_matches(str(value).casefold(), list(folded), n=1, cutoff=self.cutoff)
+            match = folded[close[0]] if close else None
+        if match is None:
+            # "sushi" -> "Sushi Bars": the most frequent value containing every word of it.
+            words = str(value).casefold().split()
+            containing = [v for v in counts if words and all(word in v.casefold().replace("/", " ").split() for word in words)]
+            match = max(containing, key=counts.get) if containing else None
+
+        if match is None:
+            self._reject()
+            close = difflib.get_close_matches(str(value), list(counts), n=5, cutoff=0.5)
+            raise ValueError(f"Unknown {field} value {value!r}." + (f" Did you mean: {', '.join(close)}?" if close else ""))
+
+        self._count_correction()
+        return match
+
+    def _correct(self, name: str, allowed, what: str) -> str:
+        if name in allowed:
+            return name
+        close = difflib.get_close_matches(str(name), list(allowed), n=1, cutoff=self.cutoff)
+        if not close:
+            self._reject()
+            raise ValueError(f"Unknown {what} {name!r} (expected one of {', '.join(allowed)}).")
+        self._count_correction()
+        return close[0]
+
+    def _count_correction(self):
+        with self._lock:
+            self.corrections += 1
+
+    def _reject(self):
+        with self._lock:
+            self.rejections += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "vocabularies": {field: len(counts) for field, counts in self.vocabularies.items()},
+                "corrections": self.corrections,
+                "rejections": self.rejections,
+            }
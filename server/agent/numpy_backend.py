@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import importlib.util
+
+import numpy as np
+
+from .search_backend import SearchBackend, default_data_dir, load_payload_schema, near_params, proximity_ranking, proximity_score
+
+RANGE_OPS = {
+    "gt": np.greater,
+    "gte": np.greater_equal,
+    "lt": np.less,
+    "lte": np.less_equal,
+}
+
+EARTH_RADIUS_M = 6371008.8
+
+# The restaurant_vectors store is read with yelp/vector_store.py, the code that writes it, so that the reader
+# cannot drift from the format (its VectorStore also checks the header against ids.json and vectors.npy).
+VECTOR_STORE_MODULE = os.path.join(os.path.dirname(__file__), "..", "..", "yelp", "vector_store.py")
+
+def _vector_store_module():
+    module = sys.modules.get("yelp_vector_store")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("yelp_vector_store", VECTOR_STORE_MODULE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules["yelp_vector_store"] = module
+    return module
+
+def _haversine(lon, lat, center: dict) -> np.ndarray:
+    """Great-circle distances in meters from center to the points (lon, lat), in degrees."""
+    lon, lat = np.radians(lon), np.radians(lat)
+    lon0, lat0 = np.radians(center["lon"]), np.radians(center["lat"])
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def _key(value):
+    # True == 1 in Python, so keep booleans apart from numbers in the inverted indexes.
+    return (isinstance(value, bool), value)
+
+class NumpyBackend(SearchBackend):
+    """
+    In-process search engine for small and medium datasets.
+
+    Vectors are kept L2-normalized in one contiguous float32 matrix, so cosine similarity is a single matrix-vector product.
+    At load time the fields of the payload schema are indexed, so filters are evaluated with bitwise operations instead of
+    walking the payloads: keyword and bool fields (arrays included) get an inverted index, numeric fields a float column
+    and geo fields ({lon, lat} values) lon/lat columns for "near" (haversine distance) and "within". Other fields, such as
+    description, cannot be filtered on. In the inverted indexes, a value on at least a quarter of the rows keeps a row
+    bitmap and a rarer one an int32 array of its rows, turned into a bitmap when a query uses it, so memory grows with
+    the number of (row, value) pairs rather than rows times distinct values.
+    Filter semantics follow the Qdrant backend: a condition on an array field matches if any element matches,
+    and a missing field never matches (so "ne"/"out" keep rows without the field).
+    A "near" condition with a weight ranks by proximity_score over all matching rows.
+
+    Args:
+        vectors (array-like): (n, dim) matrix, row i being the vector of payloads[i].
+        payloads (list[dict]): Restaurant payloads.
+        dim (int, optional): Keep only the first dim components of every vector (and query), like a truncated Qdrant collection.
+        version (optional): Data version reported by version(), e.g. the modification times of the loaded files.
+        schema (dict, optional): {field: payload index type} of the indexed fields. Defaults to yelp/payload_schema.json.
+    """
+
+    def __init__(self, vectors, payloads: list[dict], dim: int | None = None, version=None, schema: dict | None = None):
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or len(vectors) != len(payloads):
+            raise ValueError(f"Expected one vector per payload, got {vectors.shape} for {len(payloads)} payloads.")
+        vectors = np.ascontiguousarray(vectors[:, :dim], dtype=np.float32)
+        self.dim = vectors.shape[1]
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = vectors / np.where(norms == 0, 1, norms)
+        self.payloads = payloads
+        self._version = version
+        self.schema = schema if schema is not None else load_payload_schema(default_data_dir)
+
+        self._keywords = {}     # field -> {_key(value): bool mask (frequent values) or int32 row indices (rare ones)}
+        self._numbers = {}      # field -> float column, NaN where the field is missing or not numeric
+        self._points = {}       # field -> (lon, lat) columns, NaN where the field is missing
+        self._build_indexes()
+
+    @classmethod
+    def load(cls, data_dir: str, dim: int | None = None) -> "NumpyBackend":
+        """
+        Loads restaurant.json, restaurant_desc.json and the restaurant_vectors store written by yelp/vector.py
+        (see yelp/vector_store.py for the format).
+        """
+        with open(os.path.join(data_dir, "restaurant.json"), 'r', encoding='utf-8') as file:
+            restaurants = {restaurant["id"]: restaurant for restaurant in json.load(file)}
+
+        with open(os.path.join(data_dir, "restaurant_desc.json"), 'r', encoding='utf-8') as file:
+            descriptions = {item["id"]: item.get("description") for item in json.load(file)}
+
+        vector_store = _vector_store_module()
+        store = vector_store.VectorStore(os.path.join(data_dir, "restaurant_vectors"))
+
+        rows, payloads = [], []
+        for row, restaurant_id in enumerate(store.ids):
+            restaurant = restaurants.get(restaurant_id)
+            if restaurant is None:
+                continue
+            rows.append(row)
+            payloads.append({**restaurant, "description": descriptions.get(restaurant_id)})
+
+        files = ["restaurant.json", "restaurant_desc.json", os.path.join("restaurant_vectors", vector_store.VECTORS_FILE)]
+        version = tuple(os.path.getmtime(os.path.join(data_dir, file)) for file in files)
+
+        return cls(store.vectors[rows], payloads, dim, version, load_payload_schema(data_dir))
+
+    def version(self):
+        return self._version
+
+    def search(self, vector: list[float], filters: dict, top_k: int) -> list[dict]:
+        if top_k <= 0:
+            return []
+
+        query = np.asarray(vector[:self.dim], dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+
+        mask = self._filter_mask(filters)
+        if mask is None:
+            candidates = None
+            scores = self.vectors @ query
+        else:
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                return []
+            scores = self.vectors[candidates] @ query
+
+        proximity = proximity_ranking(filters)
+        if proximity is not None:
+            field, center, radius, weight = proximity
+            distances = self._distances(field, center)
+            scores = proximity_score(scores, distances if candidates is None else distances[candidates], radius, weight)
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if candidates is not None:
+            top = candidates[top]
+
+        return [self.payloads[row] for row in top]
+
+    def _build_indexes(self):
+        n = len(self.payloads)
+        postings = {}   # field -> {_key(value): rows}
+        for field, field_type in self.schema.items():
+            if field_type in ("keyword", "bool"):
+                postings[field] = {}
+            elif field_type in ("float", "integer"):
+                self._numbers[field] = np.full(n, np.nan)
+            elif field_type == "geo":
+                self._points[field] = (np.full(n, np.nan), np.full(n, np.nan))
+
+        for row, payload in enumerate(self.payloads):
+            for field, value in payload.items():
+                if field in postings:
+                    for v in value if isinstance(value, list) else [value]:
+                        if isinstance(v, (str, bool, int, float)):
+                            postings[field].setdefault(_key(v), []).append(row)
+                elif field in self._numbers:
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        self._numbers[field][row] = value
+                elif field in self._points:
+                    if isinstance(value, dict) and "lon" in value and "lat" in value:
+                        self._points[field][0][row], self._points[field][1][row] = value["lon"], value["lat"]
+
+        for field, values in postings.items():
+            self._keywords[field] = {key: self._posting(rows) for key, rows in values.items()}
+
+    def _posting(self, rows: list[int]) -> np.ndarray:
+        # A bitmap costs n bytes, a row array 4 bytes per row.
+        rows = np.array(rows, dtype=np.int32)
+        if len(rows) * 4 < len(self.payloads):
+            return rows
+        mask = np.zeros(len(self.payloads), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def _mask(self, posting: np.ndarray | None) -> np.ndarray:
+        if posting is not None and posting.dtype == bool:
+            return posting
+        mask = np.zeros(len(self.payloads), dtype=bool)
+        if posting is not None:
+            mask[posting] = True
+        return mask
+
+    def _match(self, field: str, value) -> np.ndarray:
+        column = self._numbers.get(field)
+        if column is not None:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return column == value      # NaN never equals
+            return np.zeros(len(self.payloads), dtype=bool)
+
+        try:
+            posting = self._keywords.get(field, {}).get(_key(value))
+        except TypeError:       # unhashable value, e.g. a dict
+            posting = None
+        return self._mask(posting)
+
+    def _match_any(self, field: str, values) -> np.ndarray:
+        mask = np.zeros(len(self.payloads), dtype=bool)
+        for value in values:
+            mask |= self._match(field, value)
+        return mask
+
+    def _range(self, field: str, op: str, value) -> np.ndarray:
+        column = self._numbers.get(field)
+        if column is None:
+            return np.zeros(len(self.payloads), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            return RANGE_OPS[op](column, value)     # comparisons with NaN are False
+
+    def _distances(self, field: str, center: dict) -> np.ndarray:
+        """Distance in meters of every row from center, NaN where field is missing."""
+        if field not in self._points:
+            return np.full(len(self.payloads), np.nan)
+        return _haversine(*self._points[field], center)
+
+    def _near(self, field: str, value: dict) -> np.ndarray:
+        center, radius, _ = near_params(value)
+        with np.errstate(invalid="ignore"):
+            return self._distances(field, center) <= radius
+
+    def _within(self, field: str, value: dict) -> np.ndarray:
+        if field not in self._points:
+            return np.zeros(len(self.payloads), dtype=bool)
+        lon, lat = self._points[field]
+        top_left, bottom_right = value["top_left"], value["bottom_right"]
+        with np.errstate(invalid="ignore"):
+            in_lat = (lat <= top_left["lat"]) & (lat >= bottom_right["lat"])
+            if top_left["lon"] <= bottom_right["lon"]:
+                in_lon = (lon >= top_left["lon"]) & (lon <= bottom_right["lon"])
+            else:   # the box crosses the antimeridian
+                in_lon = (lon >= top_left["lon"]) | (lon <= bottom_right["lon"])
+        return in_lat & in_lon
+
+    def _filter_mask(self, filters: dict) -> np.ndarray | None:
+        """Returns the bitmap of rows matching filters, or None if every row matches."""
+        mask = None
+        for field, cond in (filters or {}).items():
+            if not isinstance(cond, dict):
+                cond = {"eq": cond}
+
+            for op, value in cond.items():
+                if op == "eq":
+                    condition = self._match(field, value)
+                elif op == "ne":
+                    condition = ~self._match(field, value)
+                elif op in RANGE_OPS:
+                    condition = self._range(field, op, value)
+                elif op == "in":
+                    condition = self._match_any(field, value)
+                elif op == "out":
+                    condition = ~self._match_any(field, value)
+                elif op == "near":
+                    condition = self._near(field, value)
+                elif op == "within":
+                    condition = self._within(field, value)
+                else:
+                    continue
+
+                mask = condition if mask is None else mask & condition
+
+        return mask
@@ -0,0 +1,247 @@
+import os
+import time
+
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    Filter, FieldCondition, MatchValue, MatchAny, Range, PayloadSchemaType, SearchParams, QuantizationSearchParams,
+    GeoPoint, GeoRadius, GeoBoundingBox, Prefetch, FormulaQuery, SumExpression, MultExpression,
+    ExpDecayExpression, DecayParamsExpression, GeoDistance, GeoDistanceParams, PayloadSelectorExclude,
+)
+
+from .search_backend import SearchBackend, near_params, proximity_ranking
+
+# Bookkeeping that yelp/qdrant.py keeps in the payloads, not restaurant data: never returned to the agents.
+INTERNAL_PAYLOAD_FIELDS = ["content_hash"]
+
+def _equals(key: str, value) -> FieldCondition:
+    # MatchValue takes only bool, int and str: a number (e.g. stars 4.5) is matched as a one-point range instead.
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return FieldCondition(
+            key=key,
+            range=Range(gte=value, lte=value)
+        )
+    return FieldCondition(
+        key=key,
+        match=MatchValue(value=value)
+    )
+
+def _parse_filter(filters: dict):
+    must_conditions = []
+    must_not_conditions = []
+
+    for key, cond in filters.items():
+        if not isinstance(cond, dict):
+            must_conditions.append(_equals(key, cond))
+            continue
+
+        for op, value in cond.items():
+            if op == "eq":
+                must_conditions.append(_equals(key, value))
+            elif op == "ne":
+                must_not_conditions.append(_equals(key, value))
+            elif op == "gt":
+                must_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        range=Range(gt=value)
+                    )
+                )
+            elif op == "lt":
+                must_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        range=Range(lt=value)
+                    )
+                )
+            elif op == "gte":
+                must_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        range=Range(gte=value)
+                    )
+                )
+            elif op == "lte":
+                must_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        range=Range(lte=value)
+                    )
+                )
+            elif op == "in":
+                must_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        match=MatchAny(any=list(value))
+                    )
+                )
+            elif op == "out":
+                must_not_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        match=MatchAny(any=list(value))
+                    )
+                )
+            elif op == "near":
+                center, radius, _ = near_params(value)
+                must_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        geo_radius=GeoRadius(center=GeoPoint(**center), radius=radius)
+                    )
+                )
+            elif op == "within":
+                must_conditions.append(
+                    FieldCondition(
+                        key=key,
+                        geo_bounding_box=GeoBoundingBox(
+                            top_left=GeoPoint(lon=value["top_left"]["lon"], lat=value["top_left"]["lat"]),
+                            bottom_right=GeoPoint(lon=value["bottom_right"]["lon"], lat=value["bottom_right"]["lat"])
+                        )
+                    )
+                )
+
+    return Filter(
+        must=must_conditions if must_conditions else None,
+        must_not=must_not_conditions if must_not_conditions else None,
+        should=None
+    )
+
+class QdrantBackend(SearchBackend):
+    """
+    Searches a collection on a Qdrant server.
+
+    The collection's own config decides how queries are made (see yelp/qdrant.py): query vectors are truncated to the
+    collection's vector size, and a quantized collection is searched with SEARCH_OVERSAMPLING (default 2.0) and rescoring
+    with the original vectors (SEARCH_RESCORE=0 disables it). The config is re-read every CONFIG_TTL seconds,
+    because a rebuild can move the alias to a collection created with other settings.
+    The data version is the physical collection behind the alias plus the version alias that yelp/qdrant.py moves
+    whenever it changes the data, read at the same time.
+    A "near" condition with a weight is ranked in Qdrant too: the SEARCH_GEO_PREFETCH (default 100) most similar matches
+    are rescored with a formula query that computes proximity_score from the geo distance.
+
+    Args:
+        client (QdrantClient, optional): Client to use. Connects to QDRANT_URL (default localhost:6333) if None.
+        async_client (AsyncQdrantClient, optional): Client used by asearch. Connects to QDRANT_URL if None.
+        collection_name (str): Collection (or alias) holding the restaurants.
+    """
+
+    def __init__(self, client: QdrantClient | None = None, async_client: AsyncQdrantClient | None = None,
+                 collection_name: str = "restaurants"):
+        self.client = client if client is not None else QdrantClient(url=os.environ.get("QDRANT_URL"))
+        self.async_client = async_client if async_client is not None else AsyncQdrantClient(url=os.environ.get("QDRANT_URL"))
+        self.collection_name = collection_name
+
+        self.oversampling = float(os.environ.get("SEARCH_OVERSAMPLING", "2.0"))
+        self.rescore = os.environ.get("SEARCH_RESCORE", "1") != "0"
+        self.geo_prefetch = int(os.environ.get("SEARCH_GEO_PREFETCH", "100"))
+
+        self._dim = None
+        self._search_params = None
+        self._config_time = None
+        self._version = None
+
+    CONFIG_TTL = 60.0
+
+    def search(self, vector: list[float], filters: dict, top_k: int) -> list[dict]:
+        self._refresh()
+
+        near_points = self.client.query_points(**self._query(vector, filters, top_k))
+
+        return [point.payload for point in near_points.points if point.payload is not None]
+
+    async def asearch(self, vector: list[float], filters: dict, top_k: int) -> list[dict]:
+        await self._arefresh()
+
+        near_points = await self.async_client.query_points(**self._query(vector, filters, top_k))
+
+        return [point.payload for point in near_points.points if point.payload is not None]
+
+    def _query(self, vector: list[float], filters: dict, top_k: int) -> dict:
+        """query_points arguments: a plain vector search, or with proximity ranking a formula over a prefetch."""
+        query = dict(
+            query=vector[:self._dim],
+            query_filter=_parse_filter(filters),
+            search_params=self._search_params,
+        )
+
+        proximity = proximity_ranking(filters)
+        if proximity is not None:
+            field, center, radius, weight = proximity
+            query = dict(
+                prefetch=Prefetch(
+                    query=query["query"],
+                    filter=query["query_filter"],
+                    params=query["search_params"],
+                    limit=max(top_k, self.geo_prefetch)
+                ),
+                # proximity_score: (1 - weight) * $score + weight * 0.5 ** (distance / radius)
+                query=FormulaQuery(formula=SumExpression(sum=[
+                    MultExpression(mult=[1 - weight, "$score"]),
+                    MultExpression(mult=[weight, ExpDecayExpression(exp_decay=DecayParamsExpression(
+                        x=GeoDistance(geo_distance=GeoDistanceParams(origin=GeoPoint(**center), to=field)),
+                        scale=radius,
+                        midpoint=0.5
+                    ))]),
+                ]))
+            )
+
+        return dict(
+            collection_name=self.collection_name,
+            limit=top_k,
+            with_payload=PayloadSelectorExclude(exclude=INTERNAL_PAYLOAD_FIELDS),
+            **query
+        )
+
+    def version(self):
+        self._refresh()
+        return self._version
+
+    async def aversion(self):
+        await self._arefresh()
+        return self._version
+
+    def _refresh(self):
+        if self._config_stale():
+            self._configure(self.client.get_collection(self.collection_name), self.client.get_aliases())
+
+    async def _arefresh(self):
+        if self._config_stale():
+            self._configure(await self.async_client.get_collection(self.collection_name), await self.async_client.get_aliases())
+
+    def _config_stale(self) -> bool:
+        return self._config_time is None or time.monotonic() - self._config_time > self.CONFIG_TTL
+
+    def _configure(self, info, aliases):
+        vectors = info.config.params.vectors
+        quantized = info.config.quantization_config is not None or vectors.quantization_config is not None
+
+        self._dim = vectors.size
+        self._search_params = SearchParams(
+            quantization=QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        ) if quantized else None
+
+        collection, marker = self.collection_name, None
+        for alias in aliases.aliases:
+            if alias.alias_name == self.collection_name:
+                collection = alias.collection_name
+            elif alias.alias_name.startswith(f"{self.collection_name}_version_"):
+                marker = alias.alias_name
+        self._version = (collection, marker)
+
+        self._config_time = time.monotonic()
+
+    def verify_payload_schema(self, schema: dict) -> list[str]:
+        """
+        Checks that every field of schema ({field: payload schema type}) has a payload index of that type.
+        Returns one message per missing or mismatched index.
+        """
+        indexed = self.client.get_collection(self.collection_name).payload_schema
+
+        problems = []
+        for field, type in schema.items():
+            index = indexed.get(field)
+            if index is None:
+                problems.append(f"{field}: no payload index (expected {type})")
+            elif index.data_type != PayloadSchemaType(type):
+                problems.append(f"{field}: {index.data_type.value} payload index (expected {type})")
+        return problems
@@ -37,144 +37,234 @@ class Reservation(BaseModel):
     status: str = Field(default="created", description="Status of the reservation.")
 
 
-from sentence_transformers import SentenceTransformer
-model = SentenceTransformer("Qwen/Qwen3-Embedding-0.6B")
-
-from qdrant_client import QdrantClient
-client = QdrantClient()
-
-from qdrant_client.models import Filter, FieldCondition, MatchValue, Range
-
-def _parse_filter(filters: dict):
-    must_conditions = []
-    must_not_conditions = []
-    should_conditions = []
-
-    for key, cond in filters.items():
-        if not isinstance(cond, dict):
-            must_conditions.append(
-                FieldCondition(
-                    key=key,
-                    match=MatchValue(value=cond)
-                )
-            )
-            continue
-
-        for op, value in cond.items():
-            if op == "eq":
-                must_conditions.append(
-                    FieldCondition(
-                        key=key,
-                        match=MatchValue(value=value)
-                    )
-                )
-            elif op == "ne":
-                must_not_conditions.append(
-                    FieldCondition(
-                        key=key,
-                        match=MatchValue(value=value)
-                    )
-                )
-            elif op == "gt":
-                must_conditions.append(
-                    FieldCondition(
-                        key=key,
-                        range=Range(gt=value)
-                    )
-                )
-            elif op == "lt":
-                must_conditions.append(
-                    FieldCondition(
-                        key=key,
-                        range=Range(lt=value)
-                    )
-                )
-            elif op == "gte":
-                must_conditions.append(
-                    FieldCondition(
-                        key=key,
-                        range=Range(gte=value)
-                    )
-                )
-            elif op == "lte":
-                must_conditions.append(
-                    FieldCondition(
-                        key=key,
-                        range=Range(lte=value)
-                    )
-                )
-            elif op == "in":
-                for v in value:
-                    should_conditions.append(
-                        FieldCondition(
-                            key=key,
-                            match=MatchValue(value=v)
-                        )
-                    )
-
-    return Filter(
-        must=must_conditions if must_conditions else None,
-        must_not=must_not_conditions if must_not_conditions else None,
-        should=should_conditions if should_conditions else None,
+import os
+import re
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# EMBEDDING_BACKEND picks the CPU inference backend ("torch", "int8" or "onnx", see embedding_model.py).
+# EMBEDDING_MODEL (MODEL_NAME) may point at a local export, EMBEDDING_ONNX_FILE at a (quantized) ONNX file inside it.
+# server/benchmark_embedding.py compares the backends' latency, memory and recall.
+from .embedding_model import MODEL_NAME, load_embedding_model
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILE = os.environ.get("EMBEDDING_ONNX_FILE")
+
+def _lazy(factory):
+    """Returns an accessor that creates the value with factory on its first call, exactly once across threads."""
+    lock = threading.Lock()
+    value = []
+
+    def get():
+        if not value:
+            with lock:
+                if not value:
+                    value.append(factory())
+        return value[0]
+
+    return get
+
+def _load_model():
+    return load_embedding_model(MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE)
+
+# Loading the model and connecting to the search backend are deferred to first use (or warm_up),
+# so importing this module (agent startup, reloads, tests) stays cheap.
+get_model = _lazy(_load_model)
+
+# Concurrent query encodes are coalesced into one model.encode batch (EMBEDDING_BATCH_SIZE texts,
+# collected for up to EMBEDDING_BATCH_WAIT_MS), which is where the model gets most of its throughput.
+from .embedding_batcher import EmbeddingBatcher
+embedding_batcher = EmbeddingBatcher(
+    lambda texts: get_model().encode(texts).tolist(),
+    max_batch_size=int(os.environ.get("EMBEDDING_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", "2"))
+)
+
+# The LLM repeats the same few query phrasings, so cache their embeddings.
+# EMBEDDING_CACHE_PATH (optional) keeps the cache in a SQLite file across restarts.
+from .embedding_cache import EmbeddingCache
+embedding_cache = EmbeddingCache(
+    embedding_batcher.encode,
+    maxsize=int(os.environ.get("EMBEDDING_CACHE_SIZE", "1024")),
+    path=os.environ.get("EMBEDDING_CACHE_PATH"),
+    namespace=f"{MODEL_NAME}:{EMBEDDING_BACKEND}:{EMBEDDING_ONNX_FILE or ''}"
+)
+
+# Vector search engine, selected by SEARCH_BACKEND (see search_backend.create_backend).
+from .search_backend import create_backend
+get_backend = _lazy(create_backend)
+
+# Cache misses are handled on their own pool (EMBEDDING_WORKERS threads) instead of the event loop that serves
+# every other session. The threads mostly wait for the batcher, so the pool bounds how many encodes can be coalesced.
+# SEARCH_TIMEOUT bounds a whole search, in seconds.
+encode_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("EMBEDDING_WORKERS", "8")), thread_name_prefix="embedding")
+SEARCH_TIMEOUT = float(os.environ.get("SEARCH_TIMEOUT", "10"))
+
+# The same filtered searches repeat across users: results are cached for RESULT_CACHE_TTL seconds
+# (RESULT_CACHE_SIZE entries) and dropped when the backend's data version changes.
+from .result_cache import ResultCache
+result_cache = ResultCache(
+    maxsize=int(os.environ.get("RESULT_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", "300"))
+)
+
+# The LLM rephrases the same request ("romantic dinner spot", "romantic evening dining"): after encoding, the results of
+# a recent query within SEMANTIC_CACHE_THRESHOLD cosine similarity and with the same filter are reused, for up to
+# SEMANTIC_CACHE_TTL seconds. SEMANTIC_CACHE_SIZE=0 disables it.
+from .semantic_cache import SemanticCache
+semantic_cache = SemanticCache(
+    maxsize=int(os.environ.get("SEMANTIC_CACHE_SIZE", "256")),
+    threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+    ttl=float(os.environ.get("SEMANTIC_CACHE_TTL", "300"))
+)
+
+# Filters from the LLM are checked against the field types and the category/ambience/meal/parking vocabularies of
+# RESTAURANT_DATA_DIR (default: yelp/), computed once at import; near misses are corrected (see filter_schema.py).
+# The tool description lists FILTER_SCHEMA_EXAMPLES values per vocabulary instead of every one of them.
+from .search_backend import default_data_dir
+from .filter_schema import FilterSchema
+filter_schema = FilterSchema.load(os.environ.get("RESTAURANT_DATA_DIR", default_data_dir))
+FILTER_SCHEMA_EXAMPLES = int(os.environ.get("FILTER_SCHEMA_EXAMPLES", "30"))
+
+def with_filter_schema(func):
+    """Replaces the {filter_schema} line of func's docstring with filter_schema.describe(), at the same indentation."""
+    description = filter_schema.describe(FILTER_SCHEMA_EXAMPLES)
+    func.__doc__ = re.sub(
+        r"^( *)\{filter_schema\}$",
+        lambda m: "\n".join(m.group(1) + line for line in description.splitlines()),
+        func.__doc__, flags=re.MULTILINE
     )
+    return func
+
+# SEARCH_SERVICE_URL (e.g. http://localhost:8001) sends every search to the shared search service (server/search_service.py),
+# so agents and MCP servers using it neither load the model nor connect to the search backend themselves.
+from .search_client import SearchClient, SearchUnavailable
+SEARCH_SERVICE_URL = os.environ.get("SEARCH_SERVICE_URL")
+search_client = SearchClient(SEARCH_SERVICE_URL, SEARCH_TIMEOUT) if SEARCH_SERVICE_URL else None
+
+def exclude_filter(filter: dict, exclude_ids: list[str] | None) -> dict:
+    """Returns filter with an {"id": {"out": exclude_ids}} condition, merged with any id condition it already has."""
+    if not exclude_ids:
+        return filter
+
+    cond = (filter or {}).get("id", {})
+    if not isinstance(cond, dict):
+        cond = {"eq": cond}
+    return {**(filter or {}), "id": {**cond, "out": list(cond.get("out", [])) + list(exclude_ids)}}
+
+async def search_payloads(query: str, filter: dict, top_k: int, exclude_ids: list[str] | None = None) -> list[dict]:
+    """
+    Returns the payloads of the top_k matching restaurants, from the search service if SEARCH_SERVICE_URL is set,
+    else from search_local. Raises ValueError if filter does not fit filter_schema and cannot be corrected,
+    and SearchUnavailable if the search service is busy or cannot be reached.
+    """
+    if search_client is not None:
+        return await search_client.search(query, filter, top_k, exclude_ids)
+    return await search_local(query, filter, top_k, exclude_ids)
+
+async def search_local(query: str, filter: dict, top_k: int, exclude_ids: list[str] | None = None) -> list[dict]:
+    """
+    Encodes query off the event loop and returns the payloads of the top_k matching restaurants.
+    Restaurants in exclude_ids are excluded by the search backend itself, so up to top_k new restaurants are returned.
+    Raises ValueError if filter does not fit filter_schema and cannot be corrected.
+    """
+    filter = exclude_filter(filter_schema.normalize(filter), exclude_ids)
+
+    async def search():
+        backend = get_backend()
+        version = await backend.aversion()
+
+        key = result_cache.key(query, filter, top_k)
+        payloads = result_cache.get(key, version)
+        if payloads is None:
+            vector = await embedding_cache.aget(query, encode_executor)
+
+            _, filter_key, _ = key
+            payloads = semantic_cache.get(vector, filter_key, top_k, version)
+            if payloads is None:
+                payloads = await backend.asearch(vector, filter, top_k)
+                semantic_cache.put(vector, filter_key, top_k, payloads, version)
+
+            result_cache.put(key, payloads, version)
+        return payloads
 
-def search_restaurants(query: str, filter: dict, top_k: int) -> list[dict]:
+    return await asyncio.wait_for(search(), timeout=SEARCH_TIMEOUT)
+
+def search_stats() -> dict:
+    """Counters of the caches and the encode batcher, e.g. for a metrics endpoint."""
+    if search_client is not None:
+        return {"search_client": search_client.stats(), "filter_schema": filter_schema.stats()}
+    return {
+        "result_cache": result_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "filter_schema": filter_schema.stats(),
+    }
+
+_ready = threading.Event()
+
+def warm_up():
     """
-    Searches for restaurants using a combination of semantic similarity search on a query description and optional filtering conditions.
-    
-    The function performs a vector similarity search based on the provided query string, which should describe desired restaurant attributes (e.g., "good food and service"). It uses a pre-trained embedding model to encode the query and find the most similar restaurants in the vector database. Additionally, filters can be applied to narrow down results based on specific field values.
-    
+    Loads the model and the search backend and encodes a dummy query to prime the kernels.
+    Idempotent and thread-safe; call it from startup or a readiness probe so the first user request does not pay for it.
+    """
+    if not _ready.is_set():
+        get_backend()
+        get_model().encode(["memorable dining experience for a romantic evening"])
+        _ready.set()
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+def start_warm_up():
+    """Runs warm_up on a background thread. Nothing to load when searches go to the search service."""
+    if search_client is not None:
+        _ready.set()
+        return
+    threading.Thread(target=warm_up, name="search-warm-up", daemon=True).start()
+
+# SEARCH_WARM_UP=1 starts warming up as soon as the agent is imported instead of on the first search.
+if os.environ.get("SEARCH_WARM_UP") == "1":
+    start_warm_up()
+
+async def search_tool_payloads(query: str, filter: dict, top_k: int, exclude_ids: list[str] | None = None) -> list[dict]:
+    """
+    search_payloads for the search_restaurants tools: an invalid filter, a timeout or an unavailable search service
+    comes back as a single {"error": message} item the model can act on, instead of failing the agent turn.
+    """
+    try:
+        return await search_payloads(query, filter, top_k, exclude_ids)
+    except (ValueError, SearchUnavailable) as e:
+        return [{"error": str(e)}]
+    except asyncio.TimeoutError:
+        return [{"error": "search timed out"}]
+
+# The search_restaurants tools of search_agent/, the MCP servers and the search service return whole payloads,
+# but take their description from this one (copying __doc__), so the copies cannot drift apart.
+@with_filter_schema
+async def search_restaurants(query: str, filter: dict = {}, top_k: int = 5, exclude_ids: list[str] | None = None) -> list[dict]:
+    """
+    Searches for restaurants that satisfy filter, ranked by semantic similarity of their descriptions to query.
+
     Args:
-        query (str): A natural language description of the desired restaurant (e.g., "restaurants with good food and service"). This is used for semantic similarity search against stored restaurant descriptions.
-        filter (dict): A dictionary specifying filtering conditions on restaurant fields. Supports the following formats:
-            - Simple equality: {"field_name": value} – matches restaurants where 'field_name' equals 'value' (equivalent to {"field_name": {"eq": value}}).
-            - Operator-based conditions: {"field_name": {"op": value}} where 'op' can be:
-                - "eq": equals value.
-                - "ne": not equals value.
-                - "gt": greater than value (for numeric fields).
-                - "gte": greater than or equal to value (for numeric fields).
-                - "lt": less than value (for numeric fields).
-                - "lte": less than or equal to value (for numeric fields).
-            - For array fields like 'categories' (list of strings), additional operators are supported:
-                - {"categories": {"in": ["value1", "value2"]}} – matches if the array contains any of the specified values.
-            Multiple conditions can be combined in the filter dict (e.g., {"stars": {"gte": 4.0}, "categories": {"in": ["Italian", "Pizza"]}}).
-            Supported fields and their types:
-                - String fields: id, name, address, city, state, postal_code.
-                - Numeric fields: stars (float), review_count (int).
-                - Boolean fields: good_for_kids, has_tv, dogs_allowed, happy_hour, wifi.
-                - Array fields (lists of strings):
-                    - categories: Possible values include Acai Bowls, American (New), American (Traditional), Argentine, Asian Fusion, Australian, Bagels, Bakeries, Barbeque, Bars, Basque, Beer, Beer Bar, Beer Gardens, Belgian, Brazilian, Breakfast & Brunch, Breweries, Brewpubs, British, Bubble Tea, Buffets, Burgers, Butcher, Cafes, Cafeteria, Cajun/Creole, Cantonese, Caribbean, Caterers, Champagne Bars, Cheese Shops, Chicken Shop, Chicken Wings, Chinese, Cocktail Bars, Coffee & Tea, Coffee Roasteries, Coffeeshops, Comfort Food, Creperies, Cuban, Cupcakes, Delicatessen, Delis, Desserts, Dim Sum, Diners, Dive Bars, Do-It-Yourself Food, Donuts, Empanadas, Ethiopian, Ethnic Food, Ethnic Grocery, Falafel, Farmers Market, Fast Food, Fish & Chips, Fondue, Food Court, Food Delivery Services, Food Stands, Food Tours, Food Trucks, French, Fruits & Veggies, Gastropubs, Gelato, German, Gluten-Free, Greek, Grocery, Halal, Hawaiian, Health Markets, Himalayan/Nepalese, Hookah Bars, Hot Dogs, Hot Pot, Hotels, Ice Cream & Frozen Yogurt, Imported Food, Indian, Indonesian, International Grocery, Irish, Italian, Japanese, Juice Bars & Smoothies, Kebab, Korean, Latin American, Lebanese, Live/Raw Food, Local Flavor, Lounges, Meat Shops, Mediterranean, Mexican, Middle Eastern, Modern European, Moroccan, New Mexican Cuisine, Noodles, Organic Stores, Pakistani, Pasta Shops, Patisserie/Cake Shop, Personal Chefs, Peruvian, Piano Bars, Pizza, Poke, Pop-Up Restaurants, Public Markets, Pubs, Ramen, Salad, Sandwiches, Scandinavian, Seafood, Seafood Markets, Soul Food, Soup, Southern, Spanish, Speakeasies, Specialty Food, Sports Bars, Steakhouses, Street Vendors, Sushi Bars, Szechuan, Tacos, Tapas Bars, Tapas/Small Plates, Tasting Classes, Tex-Mex, Thai, Themed Cafes, Turkish, Tuscan, Vegan, Vegetarian, Vietnamese, Whiskey Bars, Wine & Spirits, Wine Bars, Wine Tasting Classes, Wine Tasting Room, Wine Tours, Wineries, Wraps.
-                    - ambiences: Possible values include casual, classy, divey, hipster, intimate, romantic, touristy, trendy, upscale.
-                    - good_for_meals: Possible values include breakfast, brunch, dessert, dinner, latenight, lunch.
-                    - parkings: Possible values include garage, lot, street, valet, validated.
-                - Location field: location (dict with 'lon' and 'lat' as floats).
-        top_k (int, optional): The number of top similar restaurants to return.
-    
+        query (str): A natural language description of the desired restaurant (e.g., "memorable dining experience for a romantic evening").
+        filter (dict): Conditions on restaurant fields that must all hold, as {"field": value} (equality) or {"field": {"op": value}},
+            e.g. {"stars": {"gte": 4.0}, "categories": {"in": ["Italian", "Pizza"]}, "dogs_allowed": true}.
+            "in"/"out" take a list and match if the field (or any element of an array field) is / is not one of its values.
+            Fields by type, with their operators:
+            {filter_schema}
+        top_k (int, optional): The number of top similar restaurants to return. Defaults to 5.
+        exclude_ids (list[str], optional): Ids of restaurants to leave out, e.g. the ones already recommended. The search then returns up to top_k other restaurants.
+
     Returns:
-        list[dict]: A list of restaurant dictionaries matching the query and filters, each containing fields like id, name, stars, etc. Results are ranked by similarity to the query.
-    
-    Example:
-        # Search for restaurants with good food and service, rated 4+ stars, in Italian or Pizza categories
-        results = search_restaurants(
-            query="restaurants with delicious food and excellent service",
-            filter={"stars": {"gte": 4.0}, "categories": {"in": ["Italian", "Pizza"]}},
-            top_k=5
-        )
-        for restaurant in results:
-            print(f"{restaurant['name']} - {restaurant['stars']} stars")
+        list[dict]: The matching restaurants, most similar first, each with at least id, name, address, stars, review_count and description.
+            If the filter is invalid, the search times out or the search service is unavailable, a single {"error": message} item instead.
     """
-    near_points = client.query_points(
-        collection_name="restaurants",
-        query=model.encode(query).tolist(),
-        query_filter=_parse_filter(filter),
-        limit=top_k
-    )
+    payloads = await search_tool_payloads(query, filter, top_k, exclude_ids)
 
-    fields = ["id", "name", "address", "stars", "review_count", "description"]
-    return [
-        {k: point.payload.get(k) for k in fields if point.payload and k in point.payload}
-        for point in near_points.points if point.payload is not None
-    ]
+    fields = ["error", "id", "name", "address", "stars", "review_count", "description"]
+    return [{k: payload.get(k) for k in fields if k in payload} for payload in payloads]
 
 """
     id: str = Field(..., description="Unique identifier for the restaurant.")
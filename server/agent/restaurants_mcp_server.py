@@ -1,17 +1,18 @@
-from .restaurants import search_restaurants as _search_restaurants
+from .restaurants import search_restaurants as _search_restaurants, start_warm_up
 
 # pip install fastmcp
 from fastmcp import FastMCP
 
 mcp = FastMCP("restaurant_search")
 
-@mcp.tool()
-def search_restaurants(query: str, filter: dict = {}, top_k: int = 5) -> list[dict]:
-    f"""
-    {_search_restaurants.__doc__}
-    """
+async def search_restaurants(query: str, filter: dict = {}, top_k: int = 5, exclude_ids: list[str] | None = None) -> list[dict]:
+    return await _search_restaurants(query, filter, top_k, exclude_ids)
 
-    return _search_restaurants(query, filter, top_k)
+# FastMCP takes the tool description from the docstring, so reuse the agent tool's (with its filter schema).
+search_restaurants.__doc__ = _search_restaurants.__doc__
+mcp.tool()(search_restaurants)
 
 if __name__ == "__main__":
+    # Load the model while the client is still connecting, not on its first tool call.
+    start_warm_up()
     mcp.run()
@@ -0,0 +1,101 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from .embedding_cache import normalize_query
+
+def canonical_filter(filter: dict | None) -> str:
+    """
+    Serializes a filter so that equivalent filters give the same string: bare values become {"eq": value},
+    keys and operators are sorted, and so are (deduplicated) "in"/"out" lists.
+    """
+    canonical = {}
+    for field, cond in (filter or {}).items():
+        if not isinstance(cond, dict):
+            cond = {"eq": cond}
+        canonical[field] = {
+            op: sorted({repr(v): v for v in value}.values(), key=repr) if op in ("in", "out") and isinstance(value, list) else value
+            for op, value in cond.items()
+        }
+    return json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+class ResultCache:
+    """
+    Bounded LRU cache of search results keyed on (normalized query, canonical filter, top_k).
+
+    Entries expire after ttl seconds. Every lookup passes the backend's current data version
+    (SearchBackend.version); when it changes, e.g. after yelp/qdrant.py re-indexed the collection, the cache is emptied.
+
+    Args:
+        maxsize (int): Maximum number of cached results. The least recently used entry is evicted first.
+        ttl (float): Seconds a result stays valid.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+        self._version = None
+        self._entries = OrderedDict()       # key -> (expiry, results)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query: str, filter: dict | None, top_k: int) -> tuple:
+        return normalize_query(query), canonical_filter(filter), top_k
+
+    def get(self, key: tuple, version=None) -> list[dict] | None:
+        with self._lock:
+            self._check_version(version)
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: tuple, results: list[dict], version=None):
+        with self._lock:
+            self._check_version(version)
+
+            self._entries[key] = (time.monotonic() + self.ttl, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -13,11 +13,11 @@ search_agent = Agent(
                 1. Analyze the user's request to understand their preferences, context, and any specific requirements (e.g., meal time, whether pets are allowed, etc.).
                 2. The list of restaurants already recommended is as follows:
                 {restaurants}
-                3. When searching for new recommended restaurants, make sure not to include any that are already in the recommended list.
-                4. Use the search_restaurants function to generate a query (natural language description) and filter (attribute-based condition) that match the user's request, and perform the search.
-                5. From the search results, select additional restaurants that are not already in the recommended list.
+                3. Use the search_restaurants function to generate a query (natural language description) and filter (attribute-based condition) that match the user's request, and perform the search.
+                4. Pass the ids of the restaurants already in the recommended list as exclude_ids. The search then returns only new restaurants (up to top_k), so there is no need to remove duplicates yourself or to ask for more results than you need.
+                5. From the search results, select the restaurants to recommend additionally.
                 6. Finally, combine the existing recommended restaurants and the newly found restaurants into a single recommendation list (restaurants).
-                7. The final recommendation list should be free of duplicates and sorted in the order that best matches the user's requirements.
+                7. The newly found restaurants should be sorted in the order that best matches the user's requirements.
                 8. **Do not change the order of the previously recommended restaurants; they must appear at the beginning of the final recommendation list in their original order. Newly recommended restaurants should be appended after them.**
                 9. **If no new restaurants can be found that meet the criteria, simply return the original recommended list without any changes.**
                 10. **Do not include any explanations or additional text in your response; only provide the final list of restaurants in the specified format.**
@@ -31,6 +31,7 @@ search_agent = Agent(
                 - User request: "Recommend a restaurant for dinner with my girlfriend. By the way, we need to bring our dog."
                 - Generated filter: {"good_for_meals": {"in": ["dinner"]}, "dogs_allowed": true}
                 - Generated query: "memorable dining experience for a romantic evening"
+                - Already recommended: restaurants with ids "abc" and "def" → exclude_ids: ["abc", "def"]
 
                 In this way, analyze the user's request, generate an appropriate filter and query, and call the search_restaurants function to complete the recommendation list.
                 """,
@@ -0,0 +1,95 @@
+import os
+import json
+import asyncio
+
+# yelp/ data: the in-process backend loads restaurants and vectors from it, the Qdrant backend its payload schema.
+default_data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "yelp")
+
+class SearchBackend:
+    """
+    Interface of a restaurant vector search engine.
+
+    Filters use the dict language documented in search_restaurants:
+    {"field": value} or {"field": {"eq" | "ne" | "gt" | "gte" | "lt" | "lte" | "in" | "out": value}},
+    and on a geo field {"near": {"lon", "lat", "radius_km", "weight"}} or {"within": {"top_left", "bottom_right"}}.
+    A "near" condition with a weight > 0 also ranks by proximity, see proximity_score.
+    """
+
+    def search(self, vector: list[float], filters: dict, top_k: int) -> list[dict]:
+        """Returns the payloads of the top_k restaurants matching filters, ranked by cosine similarity to vector."""
+        raise NotImplementedError
+
+    async def asearch(self, vector: list[float], filters: dict, top_k: int) -> list[dict]:
+        """Async variant of search. Runs search on a worker thread unless the backend has a native async client."""
+        return await asyncio.to_thread(self.search, vector, filters, top_k)
+
+    def version(self):
+        """
+        Identifies the indexed data: it changes when the data is re-indexed, so cached results can be dropped.
+        None if the backend cannot tell.
+        """
+        return None
+
+    async def aversion(self):
+        return self.version()
+
+# A "near" condition without radius_km keeps the restaurants within SEARCH_NEAR_RADIUS_KM.
+NEAR_RADIUS_KM = float(os.environ.get("SEARCH_NEAR_RADIUS_KM", "5"))
+
+def near_params(value: dict) -> tuple[dict, float, float]:
+    """Returns the center {lon, lat}, the radius in meters and the proximity weight of a "near" condition."""
+    center = {"lon": float(value["lon"]), "lat": float(value["lat"])}
+    return center, float(value.get("radius_km", NEAR_RADIUS_KM)) * 1000, float(value.get("weight", 0))
+
+def proximity_ranking(filters: dict | None) -> tuple[str, dict, float, float] | None:
+    """(field, center, radius in meters, weight) of the first "near" condition with a weight > 0, else None."""
+    for field, cond in (filters or {}).items():
+        if isinstance(cond, dict) and isinstance(cond.get("near"), dict):
+            center, radius, weight = near_params(cond["near"])
+            if weight > 0:
+                return field, center, radius, weight
+    return None
+
+def proximity_score(similarity, distance, radius: float, weight: float):
+    """
+    Ranking score of a "near" search: (1 - weight) * similarity + weight * 0.5 ** (distance / radius),
+    i.e. proximity halves every radius meters. Works on numpy arrays; the Qdrant backend computes the same formula.
+    """
+    return (1 - weight) * similarity + weight * 0.5 ** (distance / radius)
+
+def load_payload_schema(data_dir: str) -> dict:
+    """Returns the {field: payload index type} schema that yelp/qdrant.py creates indexes from."""
+    with open(os.path.join(data_dir, "payload_schema.json"), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def create_backend() -> SearchBackend:
+    """
+    Creates the backend selected by SEARCH_BACKEND:
+        - "qdrant" (default): a Qdrant server (QDRANT_URL, default localhost:6333).
+          Its payload indexes are checked against payload_schema.json, and any gap is reported.
+        - "numpy": an in-process engine loaded from RESTAURANT_DATA_DIR (default: the yelp/ directory).
+          SEARCH_VECTOR_DIM (optional) truncates its vectors, like yelp/qdrant.py --dim.
+    """
+    name = os.environ.get("SEARCH_BACKEND", "qdrant")
+    data_dir = os.environ.get("RESTAURANT_DATA_DIR", default_data_dir)
+
+    if name == "qdrant":
+        from .qdrant_backend import QdrantBackend
+        backend = QdrantBackend()
+
+        # Without these indexes every filtered query scans payloads; warn rather than refuse to start.
+        try:
+            problems = backend.verify_payload_schema(load_payload_schema(data_dir))
+        except Exception as e:
+            problems = [f"could not verify payload indexes ({e})"]
+        for problem in problems:
+            print(f"[search] {backend.collection_name}: {problem}. Run yelp/qdrant.py to create the payload indexes.")
+
+        return backend
+
+    if name == "numpy":
+        from .numpy_backend import NumpyBackend
+        dim = os.environ.get("SEARCH_VECTOR_DIM")
+        return NumpyBackend.load(data_dir, int(dim) if dim else None)
+
+    raise ValueError(f"Unknown SEARCH_BACKEND {name!r} (expected 'qdrant' or 'numpy').")
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+
+def _detail(response: httpx.Response) -> str:
+    """The message of a FastAPI error response: its detail, or the messages of a request validation error."""
+    try:
+        detail = response.json().get("detail", response.text)
+    except ValueError:
+        return response.text
+    if isinstance(detail, list):
+        return "; ".join(f"{'.'.join(map(str, error.get('loc', [])[1:]))}: {error.get('msg')}" for error in detail)
+    return str(detail)
+
+class SearchUnavailable(Exception):
+    """The search service is busy (503), failed or could not be reached."""
+
+class SearchClient:
+    """
+    Client of the shared search service (server/search_service.py), used by search_payloads when SEARCH_SERVICE_URL is set.
+
+    The service validates filters like filter_schema does: a 422 response is raised as ValueError with its message,
+    so tools report it the same way as a local search. Timeouts (of the request, or a 504 from the service) are raised
+    as asyncio.TimeoutError like a local search's, and a busy (503) or failing service or a connection error as
+    SearchUnavailable. An httpx client is kept per event loop, because its pooled connections are bound to the loop
+    that opened them (ADK and MCP servers each run their own).
+
+    Args:
+        base_url (str): URL of the search service, e.g. http://localhost:8001.
+        timeout (float): Seconds a search may take, including the wait for a free slot in the service.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=5.0)
+
+        self.requests = 0
+        self.errors = 0
+        self._clients = weakref.WeakKeyDictionary()     # event loop -> httpx.AsyncClient
+        self._lock = threading.Lock()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = self._clients[loop] = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+            return client
+
+    async def search(self, query: str, filter: dict, top_k: int, exclude_ids: list[str] | None = None) -> list[dict]:
+        """The payloads of the top_k matching restaurants, like search_payloads."""
+        body = {"query": query, "filter": filter or {}, "top_k": top_k, "exclude_ids": exclude_ids}
+        self.requests += 1
+        try:
+            try:
+                response = await self._client().post("/search", json=body)
+            except httpx.TimeoutException as e:
+                raise asyncio.TimeoutError() from e
+            except httpx.HTTPError as e:
+                raise SearchUnavailable(f"Search service unreachable: {str(e) or type(e).__name__}") from e
+            if response.status_code == 422:
+                raise ValueError(_detail(response))
+            if response.status_code == 504:
+                raise asyncio.TimeoutError()
+            if response.is_error:
+                raise SearchUnavailable(f"Search service error {response.status_code}: {_detail(response)}")
+        except Exception:
+            self.errors += 1
+            raise
+        return response.json()["results"]
+
+    async def aclose(self):
+        """Closes the client of the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "url": self.base_url,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
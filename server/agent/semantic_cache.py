@@ -0,0 +1,125 @@
+import time
+import threading
+
+import numpy as np
+
+class SemanticCache:
+    """
+    Reuses the results of a recent query whose embedding is almost the same as a new one.
+
+    Keeps the vectors of the last maxsize searched queries in one normalized matrix; a lookup is a matrix-vector product
+    over them (at this size, exact search is as fast as an ANN index would be). The most similar entry is a hit if its
+    cosine similarity is at least threshold, its canonical filter is identical, it was searched with at least top_k results
+    and is younger than ttl seconds. A change of the backend's data version empties the cache, like ResultCache.
+
+    Args:
+        maxsize (int): Number of recent queries kept. 0 disables the cache.
+        threshold (float): Minimum cosine similarity for a hit.
+        ttl (float): Seconds an entry may be reused.
+    """
+
+    def __init__(self, maxsize: int = 256, threshold: float = 0.95, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.total_hit_similarity = 0.0
+        self.min_hit_similarity = None
+        self.total_hit_age = 0.0
+
+        self._version = None
+        self._vectors = None                # (maxsize, dim), allocated on first put
+        self._filters = [None] * maxsize    # canonical filter of each slot, None if the slot is free
+        self._top_ks = np.zeros(maxsize, dtype=np.int64)
+        self._created = np.zeros(maxsize)
+        self._used = np.zeros(maxsize)
+        self._results = [None] * maxsize
+        self._lock = threading.Lock()
+
+    def get(self, vector, filter_key: str, top_k: int, version=None) -> list[dict] | None:
+        if self.maxsize <= 0:
+            return None
+
+        query = _normalize(vector)
+        with self._lock:
+            self._check_version(version)
+
+            slot, similarity = self._nearest(query, filter_key, top_k)
+            if slot is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            self._used[slot] = now
+            self.hits += 1
+            self.total_hit_similarity += similarity
+            self.min_hit_similarity = similarity if self.min_hit_similarity is None else min(self.min_hit_similarity, similarity)
+            self.total_hit_age += now - float(self._created[slot])
+            return self._results[slot][:top_k]
+
+    def put(self, vector, filter_key: str, top_k: int, results: list[dict], version=None):
+        if self.maxsize <= 0:
+            return
+
+        query = _normalize(vector)
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None or self._vectors.shape[1] != len(query):
+                self._vectors = np.zeros((self.maxsize, len(query)), dtype=np.float32)
+                self._filters = [None] * self.maxsize
+
+            # A free slot, else an expired one, else the least recently used.
+            now = time.monotonic()
+            free = [i for i, f in enumerate(self._filters) if f is None]
+            if free:
+                slot = free[0]
+            else:
+                expired = np.flatnonzero(now - self._created >= self.ttl)
+                slot = int(expired[0]) if len(expired) else int(np.argmin(self._used))
+
+            self._vectors[slot] = query
+            self._filters[slot] = filter_key
+            self._top_ks[slot] = top_k
+            self._created[slot] = self._used[slot] = now
+            self._results[slot] = list(results)
+
+    def _nearest(self, query, filter_key: str, top_k: int):
+        if self._vectors is None or self._vectors.shape[1] != len(query):
+            return None, 0.0
+
+        now = time.monotonic()
+        candidates = np.array([f == filter_key for f in self._filters]) & (self._top_ks >= top_k) & (now - self._created < self.ttl)
+        if not candidates.any():
+            return None, 0.0
+
+        similarities = np.where(candidates, self._vectors @ query, -np.inf)
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def _check_version(self, version):
+        if version != self._version:
+            self._filters = [None] * self.maxsize
+            self._results = [None] * self.maxsize
+            self._version = version
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": sum(f is not None for f in self._filters),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "mean_hit_similarity": self.total_hit_similarity / self.hits if self.hits else None,
+                "min_hit_similarity": self.min_hit_similarity,
+                "mean_hit_age_s": self.total_hit_age / self.hits if self.hits else None,
+            }
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1)
@@ -0,0 +1,137 @@
+# Compares CPU embedding backends on the restaurant set: load time, encode latency, RSS and top-k overlap
+# with the fp32 model, searched against the fp32 restaurant vectors written by yelp/vector.py.
+#
+#   python benchmark_embedding.py --backends torch int8 onnx
+#   python benchmark_embedding.py --export-onnx-int8 ./qwen3-onnx      # then:
+#   python benchmark_embedding.py --candidates "onnx:./qwen3-onnx:onnx/model_qint8_avx512_vnni.onnx"
+import time
+import argparse
+import statistics
+import multiprocessing
+
+from agent.embedding_model import MODEL_NAME, load_embedding_model, export_quantized_onnx
+from agent.search_backend import default_data_dir
+
+QUERIES = [
+    "memorable dining experience for a romantic evening",
+    "restaurants with delicious food and excellent service",
+    "cozy cafe with good coffee and pastries for a quiet morning",
+    "family friendly place with a kids menu and casual atmosphere",
+    "fresh seafood with an ocean view",
+    "authentic tacos and mexican street food",
+    "upscale steakhouse for a business dinner",
+    "lively bar with craft beer and sports on tv",
+    "healthy vegan and vegetarian options for lunch",
+    "late night spot for pizza after a concert",
+    "brunch with bottomless mimosas and outdoor seating",
+    "quiet sushi bar with an omakase menu",
+]
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", 'r') as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024     # KB on Linux
+
+def measure(name, backend, onnx_file, queries, repeats, descriptions):
+    """Runs in a fresh process so that load time and RSS are not skewed by other backends."""
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    model = load_embedding_model(name, backend, onnx_file)
+    model.encode(queries[:1])       # warm-up
+    load_s = time.perf_counter() - start
+
+    # One query per call, as search_restaurants encodes them.
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode(query)
+            latencies.append(1000 * (time.perf_counter() - start))
+
+    query_vectors = model.encode(queries)
+    document_vectors = model.encode(descriptions, batch_size=32) if descriptions else None
+
+    return {
+        "load_s": load_s,
+        "rss_mb": _rss_mb() - rss_before,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1],
+        "query_vectors": query_vectors,
+        "document_vectors": document_vectors,
+    }
+
+def top_k_ids(backend, vectors, top_k):
+    return [[payload["id"] for payload in backend.search(vector, {}, top_k)] for vector in vectors]
+
+def overlap(reference, candidate, top_k):
+    return statistics.mean(len(set(r) & set(c)) / top_k for r, c in zip(reference, candidate))
+
+def parse_candidate(spec):
+    """backend[:model[:onnx_file]]"""
+    backend, _, rest = spec.partition(":")
+    name, _, onnx_file = rest.partition(":")
+    return backend, name or MODEL_NAME, onnx_file or None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CPU embedding backends against the fp32 model.")
+    parser.add_argument("--backends", nargs="*", default=["int8", "onnx"], help="Backends to compare with fp32 torch, using the default model.")
+    parser.add_argument("--candidates", nargs="*", default=[], help="Extra candidates as backend[:model[:onnx_file]].")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5, help="Latency passes over the query set.")
+    parser.add_argument("--queries", help="File with one query per line (default: built-in queries).")
+    parser.add_argument("--reencode-documents", action="store_true", help="Also rank against restaurant vectors encoded by each candidate.")
+    parser.add_argument("--data-dir", default=default_data_dir)
+    parser.add_argument("--export-onnx-int8", metavar="DIR", help="Export an int8 ONNX copy of the model to DIR and exit.")
+    args = parser.parse_args()
+
+    if args.export_onnx_int8:
+        onnx_file = export_quantized_onnx(MODEL_NAME, args.export_onnx_int8)
+        print(f"Exported. Use EMBEDDING_BACKEND=onnx EMBEDDING_MODEL={args.export_onnx_int8} EMBEDDING_ONNX_FILE={onnx_file}")
+        return
+
+    queries = QUERIES
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as file:
+            queries = [line.strip() for line in file if line.strip()]
+
+    from agent.numpy_backend import NumpyBackend
+    reference_index = NumpyBackend.load(args.data_dir)
+    descriptions = [payload["description"] or "" for payload in reference_index.payloads] if args.reencode_documents else None
+
+    candidates = [("torch", MODEL_NAME, None)]
+    candidates += [(backend, MODEL_NAME, None) for backend in args.backends if backend != "torch"]
+    candidates += [parse_candidate(spec) for spec in args.candidates]
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend, name, onnx_file in candidates:
+        label = ":".join(part for part in (backend, name if name != MODEL_NAME else "", onnx_file or "") if part)
+        print(f"Measuring {label} ...")
+        with context.Pool(1) as pool:
+            result = pool.apply(measure, (name, backend, onnx_file, queries, args.repeats, descriptions))
+        results.append((label, result))
+
+    reference = results[0][1]
+    reference_ids = top_k_ids(reference_index, reference["query_vectors"], args.top_k)
+
+    print()
+    print(f"{'backend':<40} {'load s':>8} {'RSS MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'overlap@' + str(args.top_k):>11}"
+          + (f" {'reencoded':>10}" if args.reencode_documents else ""))
+    for label, result in results:
+        line = (f"{label:<40} {result['load_s']:>8.1f} {result['rss_mb']:>8.0f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                f"{overlap(reference_ids, top_k_ids(reference_index, result['query_vectors'], args.top_k), args.top_k):>11.3f}")
+
+        if args.reencode_documents:
+            index = NumpyBackend(result["document_vectors"], reference_index.payloads)
+            line += f" {overlap(reference_ids, top_k_ids(index, result['query_vectors'], args.top_k), args.top_k):>10.3f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
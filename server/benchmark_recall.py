@@ -0,0 +1,71 @@
+# Measures what vector truncation and quantization cost in recall: top-k overlap with an exact full-dimension search.
+#
+#   python benchmark_recall.py --dims 1024 512 256 128       # truncation, in process
+#   python benchmark_recall.py --qdrant                      # the live collection as configured by yelp/qdrant.py
+import time
+import argparse
+import statistics
+
+from qdrant_client.models import SearchParams
+
+from agent.embedding_model import MODEL_NAME, load_embedding_model
+from agent.numpy_backend import NumpyBackend
+from agent.qdrant_backend import QdrantBackend, _parse_filter
+from agent.search_backend import default_data_dir
+from benchmark_embedding import QUERIES
+
+def overlap(reference, candidate, top_k):
+    return statistics.mean(len(set(r) & set(c)) / top_k for r, c in zip(reference, candidate))
+
+def timed_ids(search, vectors):
+    ids, latencies = [], []
+    for vector in vectors:
+        start = time.perf_counter()
+        payloads = search(vector)
+        latencies.append(1000 * (time.perf_counter() - start))
+        ids.append([payload["id"] for payload in payloads])
+    return ids, statistics.median(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall of truncated and quantized vector search.")
+    parser.add_argument("--dims", type=int, nargs="*", default=[512, 256, 128])
+    parser.add_argument("--qdrant", action="store_true", help="Also measure the live Qdrant collection.")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--data-dir", default=default_data_dir)
+    args = parser.parse_args()
+
+    vectors = load_embedding_model(MODEL_NAME).encode(QUERIES)
+
+    reference_index = NumpyBackend.load(args.data_dir)
+    reference, latency = timed_ids(lambda vector: reference_index.search(vector, {}, args.top_k), vectors)
+
+    print(f"{'search':<40} {'overlap@' + str(args.top_k):>11} {'p50 ms':>8}")
+    print(f"{'numpy dim=' + str(reference_index.dim):<40} {1.0:>11.3f} {latency:>8.2f}")
+
+    for dim in args.dims:
+        index = NumpyBackend(reference_index.vectors, reference_index.payloads, dim)
+        ids, latency = timed_ids(lambda vector: index.search(vector, {}, args.top_k), vectors)
+        print(f"{'numpy dim=' + str(dim):<40} {overlap(reference, ids, args.top_k):>11.3f} {latency:>8.2f}")
+
+    if args.qdrant:
+        backend = QdrantBackend()
+        ids, latency = timed_ids(lambda vector: backend.search(vector.tolist(), {}, args.top_k), vectors)
+        label = f"qdrant dim={backend._dim}" + (f" oversampling={backend.oversampling} rescore={backend.rescore}" if backend._search_params else "")
+        print(f"{label:<40} {overlap(reference, ids, args.top_k):>11.3f} {latency:>8.2f}")
+
+        # Exact search over the collection's own (truncated, unquantized) vectors isolates the cost of quantization and HNSW.
+        def exact(vector):
+            points = backend.client.query_points(
+                collection_name=backend.collection_name,
+                query=vector[:backend._dim].tolist(),
+                query_filter=_parse_filter({}),
+                search_params=SearchParams(exact=True),
+                limit=args.top_k
+            ).points
+            return [point.payload for point in points]
+
+        ids, latency = timed_ids(exact, vectors)
+        print(f"{f'qdrant dim={backend._dim} exact':<40} {overlap(reference, ids, args.top_k):>11.3f} {latency:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import json
+from string import Formatter
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+def _escape(value) -> str:
+    """value as the inside of a JSON string literal."""
+    return _dumps(str(value))[1:-1]
+
+class _Defaults(dict):
+    # Missing keys format as an empty string.
+    def __missing__(self, key):
+        return ""
+
+class CompiledTemplate:
+    """
+    A templates.json entry compiled for repeated rendering.
+
+    String leaves are str.format templates; a missing key renders as an empty string. At compile time every subtree
+    without placeholders is serialized once, so render() only formats the placeholder leaves and joins the pieces.
+    The output is the same as json.dumps of the formatted tree, with ensure_ascii=False.
+    """
+
+    def __init__(self, template):
+        self._parts = []        # str: JSON text, tuple: a string leaf with placeholders
+        self._compile(template)
+        self._merge_static()
+
+    def render(self, values: dict) -> str:
+        out = []
+        for part in self._parts:
+            if isinstance(part, str):
+                out.append(part)
+            elif part[0] == "fields":
+                _, fields, tail = part
+                out.append('"')
+                for literal, key in fields:
+                    out.append(literal)
+                    out.append(_escape(values.get(key, "")))
+                out.append(tail)
+                out.append('"')
+            else:
+                out.append(_dumps(part[1].format_map(_Defaults(values))))
+        return "".join(out)
+
+    def _compile(self, node):
+        if not _has_placeholders(node):
+            self._parts.append(_dumps(node))
+        elif isinstance(node, dict):
+            self._parts.append("{")
+            for i, (key, value) in enumerate(node.items()):
+                self._parts.append((", " if i else "") + _dumps(key) + ": ")
+                self._compile(value)
+            self._parts.append("}")
+        elif isinstance(node, list):
+            self._parts.append("[")
+            for i, value in enumerate(node):
+                if i:
+                    self._parts.append(", ")
+                self._compile(value)
+            self._parts.append("]")
+        else:
+            self._parts.append(_compile_string(node))
+
+    def _merge_static(self):
+        merged = []
+        for part in self._parts:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            else:
+                merged.append(part)
+        self._parts = merged
+
+def _has_placeholders(node) -> bool:
+    if isinstance(node, dict):
+        return any(_has_placeholders(value) for value in node.values())
+    if isinstance(node, list):
+        return any(_has_placeholders(value) for value in node)
+    if isinstance(node, str):
+        return any(field is not None for _, field, _, _ in Formatter().parse(node))
+    return False
+
+def _compile_string(template: str) -> tuple:
+    fields, literal = [], ""
+    for text, field, spec, conversion in Formatter().parse(template):
+        literal += _escape(text)
+        if field is None:
+            continue
+        if not field.isidentifier() or spec or conversion:
+            return ("format", template)     # indexing, attributes or format specs: leave it to str.format
+        fields.append((literal, field))
+        literal = ""
+    return ("fields", fields, literal)
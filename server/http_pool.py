@@ -0,0 +1,83 @@
+import os
+import time
+
+# pip install httpx (httpx[http2] for HTTP_HTTP2=1)
+import httpx
+
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_HTTP2 = os.environ.get("HTTP_HTTP2", "0") == "1"
+
+class MeteredTransport(httpx.AsyncHTTPTransport):
+    """
+    AsyncHTTPTransport that counts requests, errors and new connections.
+
+    A connection is counted as opened the first time it shows up in the pool, so opened / requests is the share
+    of requests that could not reuse a kept-alive connection. Latency is measured up to the response headers.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.opened = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._seen = set()
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            self.in_flight -= 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self._count_connections()
+
+    def _connections(self) -> list:
+        pool = self._pool
+        return list(getattr(pool, "connections", None) or getattr(pool, "_connections", []))
+
+    def _count_connections(self):
+        current = {id(connection) for connection in self._connections()}
+        self.opened += len(current - self._seen)
+        self._seen = current
+
+    def stats(self) -> dict:
+        connections = self._connections()
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "connections_opened": self.opened,
+            "reuse_rate": 1 - self.opened / self.requests if self.requests else 0.0,
+            "mean_latency_ms": 1000 * self.total_latency / self.requests if self.requests else 0.0,
+            "max_latency_ms": 1000 * self.max_latency,
+        }
+
+def create_http_client(base_url: str) -> tuple[httpx.AsyncClient, MeteredTransport]:
+    """
+    Creates the application-wide AsyncClient: one connection pool, kept alive across requests.
+    Timeouts are given per call; the client default only guards calls that forget to.
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+    transport = MeteredTransport(limits=limits, http2=HTTP_HTTP2)
+    client = httpx.AsyncClient(base_url=base_url, transport=transport, timeout=httpx.Timeout(10.0))
+    return client, transport
@@ -0,0 +1,32 @@
+def _pointer(path: str, key) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+def diff(old, new, path: str = "") -> list[dict]:
+    """
+    Returns a JSON Patch (RFC 6902) that turns old into new.
+
+    Objects are diffed key by key and equal-length arrays item by item; an array that only grew gets "add .../-" ops
+    for the new items, so appending restaurants to a list only sends the new ones. Anything else is replaced whole.
+    """
+    if old == new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "remove", "path": _pointer(path, key)} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                ops += diff(old[key], value, _pointer(path, key))
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        if len(new) > len(old) and new[:len(old)] == old:
+            return [{"op": "add", "path": f"{path}/-", "value": value} for value in new[len(old):]]
+        if len(new) == len(old):
+            ops = []
+            for i, (a, b) in enumerate(zip(old, new)):
+                ops += diff(a, b, _pointer(path, i))
+            return ops
+
+    return [{"op": "replace", "path": path, "value": new}]
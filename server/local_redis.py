@@ -0,0 +1,109 @@
+import time
+import asyncio
+
+class LocalRedis:
+    """
+    In-process stand-in for the subset of redis.asyncio.Redis (with decode_responses=True) used by RedisSessionBackend:
+    hashes, key expiry and streams. Lets the Redis backend run and be tested without a Redis server;
+    it obviously does not share anything between processes.
+    """
+
+    def __init__(self):
+        self._data = {}             # key -> dict (hash) or list of (id, fields) (stream)
+        self._expires = {}          # key -> monotonic deadline
+        self._last_id = (0, 0)
+        self._changed = asyncio.Condition()
+
+    def _get(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    async def hset(self, name: str, key: str | None = None, value=None, mapping: dict | None = None) -> int:
+        values = self._get(name)
+        if values is None:
+            values = self._data[name] = {}
+        updates = dict(mapping or {})
+        if key is not None:
+            updates[key] = value
+
+        added = len(updates.keys() - values.keys())
+        values.update({k: str(v) for k, v in updates.items()})
+        return added
+
+    async def hget(self, key: str, field: str) -> str | None:
+        return (self._get(key) or {}).get(field)
+
+    async def hgetall(self, key: str) -> dict:
+        return dict(self._get(key) or {})
+
+    async def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._get(key) is not None)
+
+    async def expire(self, key: str, seconds: float) -> bool:
+        if self._get(key) is None:
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            deleted += self._get(key) is not None
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return deleted
+
+    def _next_id(self) -> str:
+        ms = int(time.time() * 1000)
+        self._last_id = (ms, 0) if ms > self._last_id[0] else (self._last_id[0], self._last_id[1] + 1)
+        return f"{self._last_id[0]}-{self._last_id[1]}"
+
+    async def xadd(self, key: str, fields: dict, maxlen: int | None = None, approximate: bool = True) -> str:
+        entries = self._get(key)
+        if entries is None:
+            entries = self._data[key] = []
+
+        entry_id = self._next_id()
+        entries.append((entry_id, {k: str(v) for k, v in fields.items()}))
+        if maxlen is not None and len(entries) > maxlen:
+            del entries[:len(entries) - maxlen]
+
+        async with self._changed:
+            self._changed.notify_all()
+        return entry_id
+
+    def _read(self, streams: dict, count: int | None) -> list:
+        result = []
+        for key, last_id in streams.items():
+            after = _parse_id(last_id)
+            entries = [(entry_id, fields) for entry_id, fields in (self._get(key) or []) if _parse_id(entry_id) > after]
+            if entries:
+                result.append([key, entries[:count] if count else entries])
+        return result
+
+    async def xread(self, streams: dict, count: int | None = None, block: int | None = None) -> list:
+        deadline = None if not block else time.monotonic() + block / 1000      # block=0 waits forever, like Redis
+
+        async with self._changed:
+            while True:
+                result = self._read(streams, count)
+                if result or block is None:
+                    return result
+
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return []
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return []
+
+    async def aclose(self):
+        pass
+
+def _parse_id(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
@@ -1,13 +1,22 @@
 import os
 
-mcp_server_path = os.path.join(os.path.dirname(__file__), "restaurants_mcp_server.py")
-
-from google.adk.tools.mcp_tool import MCPToolset, StdioConnectionParams
+from google.adk.tools.mcp_tool import MCPToolset, StdioConnectionParams, StreamableHTTPConnectionParams
 from mcp.client.stdio import StdioServerParameters
 
-restaurant_mcp = MCPToolset(
+# With SEARCH_SERVICE_URL, use the MCP endpoint of the shared search service (server/search_service.py): no subprocess
+# per toolset, no model load on connect, and the connection lives on ADK's own event loop.
+# Without it, spawn restaurants_mcp_server.py over stdio. Its imports are light now (the model loads in the background
+# after the handshake), so the MCP session no longer times out while the model loads.
+SEARCH_SERVICE_URL = os.environ.get("SEARCH_SERVICE_URL")
+
+if SEARCH_SERVICE_URL:
+    connection_params = StreamableHTTPConnectionParams(url=f"{SEARCH_SERVICE_URL.rstrip('/')}/mcp")
+else:
+    mcp_server_path = os.path.join(os.path.dirname(__file__), "restaurants_mcp_server.py")
     connection_params = StdioConnectionParams(
-        server_params = StdioServerParameters(command="python", args=[mcp_server_path])))
+        server_params = StdioServerParameters(command="python", args=[mcp_server_path]))
+
+restaurant_mcp = MCPToolset(connection_params = connection_params)
 
 from google.adk.agents import Agent
 
@@ -33,6 +42,3 @@ root_agent = Agent(
                 """,
     tools=[restaurant_mcp]
 )
-
-# python mcp 서버가 제대로 동작되지 않는듯.
-# 아마도 event loop 문제인듯.
\ No newline at end of file
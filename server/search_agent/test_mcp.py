@@ -3,8 +3,10 @@ from fastmcp import Client
 
 import os
 
+# The shared search service (SEARCH_SERVICE_URL) over streamable HTTP, else restaurants_mcp_server.py over stdio.
 mcp_server_path = os.path.join(os.path.dirname(__file__), "restaurants_mcp_server.py")
-client = Client(mcp_server_path)
+SEARCH_SERVICE_URL = os.environ.get("SEARCH_SERVICE_URL")
+client = Client(f"{SEARCH_SERVICE_URL.rstrip('/')}/mcp" if SEARCH_SERVICE_URL else mcp_server_path)
 
 async def main():
     async with client:
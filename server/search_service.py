@@ -0,0 +1,140 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+# pip install fastapi uvicorn fastmcp
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# The one process that loads the embedding model and talks to the search backend; agents and MCP servers started
+# with SEARCH_SERVICE_URL pointing here share it. It searches in process, whatever SEARCH_SERVICE_URL its
+# environment has for them.
+os.environ.pop("SEARCH_SERVICE_URL", None)
+
+from agent.restaurants import search_local, search_tool_payloads, search_restaurants as _search_restaurants, search_stats, start_warm_up, is_ready
+
+# At most SEARCH_SERVICE_CONCURRENCY searches run at once and SEARCH_SERVICE_MAX_WAITING more wait for a slot;
+# beyond that requests are turned away with 503 (HTTP) or a tool error (MCP) instead of piling up until they time out.
+SEARCH_SERVICE_CONCURRENCY = int(os.environ.get("SEARCH_SERVICE_CONCURRENCY", "32"))
+SEARCH_SERVICE_MAX_WAITING = int(os.environ.get("SEARCH_SERVICE_MAX_WAITING", "256"))
+# Larger top_k values are clamped, over HTTP and MCP alike.
+SEARCH_SERVICE_MAX_TOP_K = int(os.environ.get("SEARCH_SERVICE_MAX_TOP_K", "50"))
+
+class ServiceBusy(Exception):
+    pass
+
+class ConcurrencyLimiter:
+    """Bounds the searches running at once and the requests waiting for one to finish."""
+
+    def __init__(self, limit: int, max_waiting: int):
+        self.limit = limit
+        self.max_waiting = max_waiting
+
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise ServiceBusy(f"Search service busy ({self.running} searches running, {self.waiting} waiting).")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.limit,
+            "max_waiting": self.max_waiting,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+limiter = ConcurrencyLimiter(SEARCH_SERVICE_CONCURRENCY, SEARCH_SERVICE_MAX_WAITING)
+
+# Streamable-HTTP MCP endpoint at /mcp, for MCPToolset (search_agent/agent_mcp.py) and other MCP clients.
+from fastmcp import FastMCP
+
+mcp = FastMCP("restaurant_search")
+
+async def search_restaurants(query: str, filter: dict = {}, top_k: int = 5, exclude_ids: list[str] | None = None) -> list[dict]:
+    try:
+        async with limiter.slot():
+            return await search_tool_payloads(query, filter, min(top_k, SEARCH_SERVICE_MAX_TOP_K), exclude_ids)
+    except ServiceBusy as e:
+        return [{"error": str(e)}]
+
+# Same description as the agents' tool; FastMCP reads it when the tool is registered.
+search_restaurants.__doc__ = _search_restaurants.__doc__
+mcp.tool()(search_restaurants)
+
+mcp_app = mcp.http_app(path="/mcp")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model in the background: /healthz answers right away, /readyz once the first search would be fast.
+    start_warm_up()
+    async with mcp_app.lifespan(app):
+        yield
+
+app = FastAPI(lifespan=lifespan)
+
+class SearchRequest(BaseModel):
+    query: str
+    filter: dict = {}
+    top_k: int = 5
+    exclude_ids: list[str] | None = None
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    """The payloads of the top_k matching restaurants (see agent.restaurants.search_local)."""
+    try:
+        async with limiter.slot():
+            results = await search_local(request.query, request.filter, min(request.top_k, SEARCH_SERVICE_MAX_TOP_K), request.exclude_ids)
+    except ServiceBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Search timed out.")
+    return {"results": results}
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"status": "warming up"})
+    return {"status": "ready"}
+
+@app.get("/metrics")
+async def metrics():
+    return {"service": limiter.stats(), **search_stats()}
+
+# Last, so that it does not shadow the routes above.
+app.mount("/", mcp_app)
+
+# 실행 명령: uvicorn search_service:app --port 8001
+# 에이전트와 MCP 서버는 SEARCH_SERVICE_URL=http://localhost:8001 로 이 서비스를 공유합니다.
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.environ.get("SEARCH_SERVICE_HOST", "127.0.0.1"), port=int(os.environ.get("SEARCH_SERVICE_PORT", "8001")))
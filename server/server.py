@@ -1,10 +1,37 @@
 import asyncio
+from contextlib import asynccontextmanager
 
 # pip install fastapi uvicorn
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import StreamingResponse
 
-app = FastAPI()
+import os
+import httpx
+
+from http_pool import create_http_client
+from session_backend import create_session_backend
+from session_store import SESSION_TTL, SESSION_DISCONNECT_TTL
+
+ADK_URL = os.environ.get("ADK_URL", "http://localhost:8000")
+
+# Per-call timeouts: creating a session is quick, a run covers a whole agent turn.
+SESSION_TIMEOUT = httpx.Timeout(float(os.environ.get("ADK_SESSION_TIMEOUT", "10")), connect=5.0)
+RUN_TIMEOUT = httpx.Timeout(float(os.environ.get("ADK_RUN_TIMEOUT", "60")), connect=5.0)
+
+# Idle /stream connections get a comment line this often, so proxies do not cut them.
+SSE_HEARTBEAT = float(os.environ.get("SSE_HEARTBEAT", "15"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One client for the whole application, so /session and /chat reuse kept-alive connections to ADK.
+    app.state.http_client, app.state.http_transport = create_http_client(ADK_URL)
+    sweeper = asyncio.create_task(_sweep_sessions())
+    yield
+    sweeper.cancel()
+    await sessions.close()
+    await app.state.http_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 from fastapi.middleware.cors import CORSMiddleware
@@ -16,87 +43,144 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-import os
 import json
 
+from card_templates import CompiledTemplate
+
 with open(os.path.join(os.path.dirname(__file__), "templates.json"), "r", encoding="utf-8") as f:
     templates = json.load(f)
 
-def format_dict(d, values):
-    if isinstance(d, dict):
-        return {k: format_dict(v, values) for k, v in d.items()}
-    elif isinstance(d, list):
-        return [format_dict(i, values) for i in d]
-    elif isinstance(d, str):
-        try:
-            return d.format(**values)
-        except KeyError as e:
-            # Replace missing keys with empty string
-            class DefaultDict(dict):
-                def __missing__(self, key):
-                    return ""
-            return d.format_map(DefaultDict(values))
-    return d
+restaurant_card = CompiledTemplate(templates["restaurant_card"])
+
+# Sent as is; its placeholders are evaluated by the app.
+RESERVATION_MESSAGE = json.dumps(templates["reservation_state"], ensure_ascii=False)
+
+RESTAURANT_CARD_FIELDS = ["id", "name", "address", "stars", "review_count"]
 
 def restaurant_card_message(idx: int) -> str:
-    fields = ["id", "name", "address", "stars", "review_count"]
-    restaurant = {field: f"{{restaurants[{idx}].{field}}}" for field in fields}
+    restaurant = {field: f"{{restaurants[{idx}].{field}}}" for field in RESTAURANT_CARD_FIELDS}
 
-    return json.dumps(format_dict(templates["restaurant_card"], restaurant), ensure_ascii=False)
+    return restaurant_card.render(restaurant)
+
+import json_patch
 
 def state_message(state: dict) -> str:
-    return json.dumps({"state": state}, ensure_ascii=False)
+    """The full client state, sent when a /stream connects."""
+    return json.dumps({"state": state["client"], "version": state["version"]}, ensure_ascii=False)
+
+def state_patch_message(state: dict, update: dict) -> str:
+    """
+    Merges update into the client state and returns the JSON Patch message that does the same on the client.
+    The client applies patches whose version is newer than its state and skips the others (e.g. replayed ones).
+    """
+    client = {**state["client"], **update}
+    patch = json_patch.diff(state["client"], client)
+
+    state["client"] = client
+    state["version"] += 1
+    return json.dumps({"patch": patch, "version": state["version"]}, ensure_ascii=False)
 
 def reservation_message() -> str:
-    return json.dumps(templates["reservation_state"], ensure_ascii=False)
+    return RESERVATION_MESSAGE
 
 import uuid
-import httpx
 
 async def _create_session():
     session_id = str(uuid.uuid4())
-    url = "http://localhost:8000/apps/agent/users/user1/sessions/" + session_id
+    url = "/apps/agent/users/user1/sessions/" + session_id
     payload = {
         "restaurants": "",
         "reservation": ""
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
-        response.raise_for_status()
+    response = await app.state.http_client.post(url, json=payload, timeout=SESSION_TIMEOUT)
+    response.raise_for_status()
 
-        data = response.json()
-        session_id = data.get("id", session_id)
+    data = response.json()
+    session_id = data.get("id", session_id)
 
     return session_id
 
-async def _invoke_agent(session_id: str, user_message: str) -> dict:
-    url = "http://localhost:8000/run"
+async def _invoke_agent(session_id: str, user_message: str):
+    """
+    Runs one agent turn through ADK's /run_sse and yields the stateDelta of each event as soon as it arrives,
+    instead of waiting for the whole trajectory like /run.
+    """
+    url = "/run_sse"
     payload = {
         "app_name": "agent",
         "user_id": "user1",
         "session_id": session_id,
         "new_message": { "role": "user", "parts": [{ "text": user_message }] },
+        "streaming": False,
     }
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(url, json=payload)
+    # The read timeout applies between chunks, i.e. to the gap between two events rather than to the whole turn.
+    async with app.state.http_client.stream("POST", url, json=payload, timeout=RUN_TIMEOUT) as response:
         response.raise_for_status()
-        data = response.json()
 
-        return data[-1]["actions"]["stateDelta"]
-    
-sessions = set()
-message_queues = {}
-restaurants = {}
-reservation = {}
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+
+            event = json.loads(line[len("data:"):])
+            if "error" in event:
+                raise HTTPException(status_code=502, detail=event["error"])
+
+            state_delta = (event.get("actions") or {}).get("stateDelta")
+            if state_delta:
+                yield state_delta
+
+_background_tasks = set()
+
+def _on_evict(session):
+    # Forget the ADK session too; nothing can reach it anymore.
+    task = asyncio.create_task(_delete_session(session.id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+sessions = create_session_backend(on_evict=_on_evict)
+
+async def _delete_session(session_id: str):
+    url = "/apps/agent/users/user1/sessions/" + session_id
+    try:
+        response = await app.state.http_client.delete(url, timeout=SESSION_TIMEOUT)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"[{session_id}] Failed to delete the ADK session: {e!r}")
+
+async def _sweep_sessions():
+    interval = min(SESSION_TTL, SESSION_DISCONNECT_TTL) / 4
+    while True:
+        await asyncio.sleep(interval)
+        sessions.sweep()
+
+async def _push_state_delta(session_id: str, state: dict, state_delta: dict):
+    if "restaurants" in state_delta:
+        length = len(state["restaurants"]) if state["restaurants"] is not None else 0
+
+        await sessions.publish(session_id, state_patch_message(state, state_delta["restaurants"]))
+
+        for idx in range(length, len(state_delta["restaurants"]["restaurants"])):
+            await sessions.publish(session_id, restaurant_card_message(idx))
+
+        state["restaurants"] = state_delta["restaurants"]["restaurants"]
+
+    if "reservation" in state_delta:
+        if state["reservation"] is None:
+            await sessions.publish(session_id, reservation_message())
+
+        state_delta["reservation"]["selected"] = state_delta["reservation"]["selected"] - 1
+
+        await sessions.publish(session_id, state_patch_message(state, state_delta["reservation"]))
+        state["reservation"] = state_delta["reservation"]
+
+    await sessions.save(session_id, state)
 
 @app.post("/session")           # localhost:5000/session
 async def create_session():
     session_id = await _create_session()
-
-    sessions.add(session_id)
-    message_queues[session_id] = asyncio.Queue()
+    await sessions.create(session_id)
 
     return {"session_id": session_id}
 
@@ -105,49 +189,52 @@ async def chat(request: Request):
     data = await request.json()
     session_id = data.get("session_id")
 
+    state = await sessions.load(session_id) if session_id else None
+    if state is None:
+        raise HTTPException(status_code=400, detail="Invalid session_id")
+
     if "text" in data and data["text"].strip():
         user_message = data["text"]
         print(f"[{session_id}] User: {user_message}")
 
-        if not session_id or session_id not in sessions:
-            raise HTTPException(status_code=400, detail="Invalid session_id")
-        
-        state_delta = await _invoke_agent(session_id, user_message)
-        print(f"[{session_id}] Agent: {state_delta}")
-
-        if "restaurants" in state_delta:
-            length = len(restaurants[session_id]) if session_id in restaurants else 0
-
-            await message_queues[session_id].put(state_message(state_delta["restaurants"]))
-
-            for idx in range(length, len(state_delta["restaurants"]["restaurants"])):
-                await message_queues[session_id].put(restaurant_card_message(idx))
-
-            restaurants[session_id] = state_delta["restaurants"]["restaurants"]
-
-        if "reservation" in state_delta:
-            if session_id not in reservation:
-                await message_queues[session_id].put(reservation_message())
-
-            state_delta["reservation"]["selected"] = state_delta["reservation"]["selected"] - 1
-
-            await message_queues[session_id].put(state_message(state_delta["reservation"]))
-            reservation[session_id] = state_delta["reservation"]
+        async for state_delta in _invoke_agent(session_id, user_message):
+            print(f"[{session_id}] Agent: {state_delta}")
+            await _push_state_delta(session_id, state, state_delta)
     else:
-        await message_queues[session_id].put("무엇을 도와드릴까요?")
+        await sessions.publish(session_id, "무엇을 도와드릴까요?")
 
     return {"result": "ok"}
 
+def sse_event(event_id: str, msg: str) -> str:
+    data = "".join(f"data: {line}\n" for line in msg.split("\n"))
+    return f"id: {event_id}\n{data}\n"          # "\n\n" is required for SSE
+
 @app.get("/stream/{session_id}")
-async def stream(session_id: str):
-    if session_id not in sessions:
+async def stream(session_id: str, request: Request):
+    state = await sessions.load(session_id)
+    if state is None:
         raise HTTPException(status_code=400, detail="Invalid session_id")
 
-    async def event_generator():
-        while True:
-            msg = await message_queues[session_id].get()
-            yield f"{msg}\n\n"          # "\n\n" is required for SSE
+    # Sent by EventSource (and our app) on reconnect: resume right after the last event the client got.
+    last_event_id = request.headers.get("last-event-id")
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    async def event_generator():
+        # Every connection starts from a snapshot, without an id so that it does not move the client's Last-Event-ID.
+        # Patches replayed or queued before it are older than the snapshot and get skipped by the client.
+        if state["version"]:
+            yield f"data: {state_message(state)}\n\n"
+
+        async for event in sessions.subscribe(session_id, last_event_id, SSE_HEARTBEAT):
+            if event is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield sse_event(*event)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=headers)
+
+@app.get("/metrics")
+async def metrics():
+    return {"http_pool": app.state.http_transport.stats(), "sessions": sessions.stats()}
 
 # FastAPI 실행 명령: uvicorn server:app --port 5000 --reload
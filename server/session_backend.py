@@ -0,0 +1,232 @@
+import os
+import re
+import json
+
+from session_store import SessionStore, SESSION_TTL, SESSION_DISCONNECT_TTL, SESSION_QUEUE_SIZE, SESSION_REPLAY_SIZE
+
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")      # "local": in-process stand-in, see local_redis.py
+
+def initial_state() -> dict:
+    return {
+        "restaurants": None,    # last restaurants list and reservation sent to the client
+        "reservation": None,
+        "client": {},           # the state the client has, as built from the state messages
+        "version": 0,           # incremented by every state message
+    }
+
+class SessionBackend:
+    """
+    Where session state lives and how messages reach the /stream connection of a session.
+
+    state is a JSON-serializable dict, see initial_state().
+    subscribe(session_id, last_event_id, heartbeat) yields (event id, message) pairs in order, resuming after
+    last_event_id if given, and None after heartbeat idle seconds. It ends when the session is evicted.
+    """
+
+    async def create(self, session_id: str):
+        raise NotImplementedError
+
+    async def load(self, session_id: str) -> dict | None:
+        """Returns the session state, or None if there is no such session. Counts as activity."""
+        raise NotImplementedError
+
+    async def save(self, session_id: str, state: dict):
+        raise NotImplementedError
+
+    async def publish(self, session_id: str, message: str):
+        raise NotImplementedError
+
+    def subscribe(self, session_id: str, last_event_id: str | None = None, heartbeat: float | None = None):
+        raise NotImplementedError
+
+    def sweep(self):
+        """Called periodically to evict expired sessions, if the backend does not expire them itself."""
+
+    def stats(self) -> dict:
+        return {}
+
+    async def close(self):
+        pass
+
+class InProcessSessionBackend(SessionBackend):
+    """Sessions in a SessionStore of this process. Only works with a single worker."""
+
+    def __init__(self, on_evict=None):
+        self.store = SessionStore(on_evict=on_evict)
+
+    async def create(self, session_id: str):
+        self.store.create(session_id)
+
+    async def load(self, session_id: str) -> dict | None:
+        session = self.store.get(session_id)
+        if session is None:
+            return None
+        return {**initial_state(), **session.state}
+
+    async def save(self, session_id: str, state: dict):
+        session = self.store.get(session_id)
+        if session is not None:
+            session.state = state
+
+    async def publish(self, session_id: str, message: str):
+        session = self.store.get(session_id)
+        if session is not None:
+            session.put(message)
+
+    async def subscribe(self, session_id: str, last_event_id: str | None = None, heartbeat: float | None = None):
+        session = self.store.get(session_id)
+        if session is None:
+            return
+
+        cursor = session.delivered
+        if last_event_id is not None and last_event_id.isdigit():
+            cursor = min(int(last_event_id), session.last_id)
+
+        self.store.connect(session)
+        try:
+            while True:
+                if not await session.wait(cursor, heartbeat):
+                    yield None
+                    continue
+                if session.closed:                  # evicted
+                    return
+
+                for message_id, message in session.read(cursor):
+                    cursor = message_id
+                    session.ack(message_id)
+                    yield str(message_id), message
+        finally:
+            # Runs when the client disconnects, too: the session then expires after SESSION_DISCONNECT_TTL.
+            self.store.disconnect(session)
+
+    def sweep(self):
+        self.store.evict_expired()
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+STREAM_ID = re.compile(r"\d+-\d+")
+
+class RedisSessionBackend(SessionBackend):
+    """
+    Sessions in Redis, shared by every worker and replica: /chat and /stream may be served by different processes.
+
+    The state is a hash "session:{id}" (one JSON value per state key, plus the delivery cursor) and the messages a stream "session:{id}:messages", capped at
+    about queue_size + replay_size entries (the oldest are dropped, like the in-process "drop_oldest" policy).
+    Stream entry ids are the SSE event ids, so delivered entries double as the replay ring. Both keys expire after
+    ttl seconds without activity, or disconnect_ttl seconds after the last /stream client went away;
+    configure Redis with a volatile-lru maxmemory-policy to bound the number of sessions.
+    The hash also keeps the id of the last message delivered, so a new /stream connection continues from there.
+
+    Args:
+        redis: A redis.asyncio.Redis created with decode_responses=True, or a LocalRedis.
+        block_ms (int): How long a subscriber waits for messages before checking that its session still exists.
+    """
+
+    def __init__(self, redis, ttl: float = SESSION_TTL, disconnect_ttl: float = SESSION_DISCONNECT_TTL,
+                 queue_size: int = SESSION_QUEUE_SIZE, replay_size: int = SESSION_REPLAY_SIZE, block_ms: int = 10000):
+        self.redis = redis
+        self.ttl = ttl
+        self.disconnect_ttl = disconnect_ttl
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.block_ms = block_ms
+
+        self.published = 0
+        self.delivered = 0
+        self.streams = 0
+
+    @staticmethod
+    def _state_key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def _messages_key(session_id: str) -> str:
+        return f"session:{session_id}:messages"
+
+    async def _expire(self, session_id: str, seconds: float):
+        await self.redis.expire(self._state_key(session_id), int(seconds))
+        await self.redis.expire(self._messages_key(session_id), int(seconds))
+
+    async def create(self, session_id: str):
+        await self.redis.hset(self._state_key(session_id), "cursor", "0")
+        await self._expire(session_id, self.ttl)
+
+    async def load(self, session_id: str) -> dict | None:
+        values = await self.redis.hgetall(self._state_key(session_id))
+        if not values:
+            return None
+        await self._expire(session_id, self.ttl)
+        values.pop("cursor", None)
+        return {**initial_state(), **{key: json.loads(value) for key, value in values.items()}}
+
+    async def save(self, session_id: str, state: dict):
+        mapping = {key: json.dumps(value, ensure_ascii=False) for key, value in state.items()}
+        await self.redis.hset(self._state_key(session_id), mapping=mapping)
+
+    async def publish(self, session_id: str, message: str):
+        await self.redis.xadd(self._messages_key(session_id), {"message": message}, maxlen=self.queue_size + self.replay_size, approximate=True)
+        await self._expire(session_id, self.ttl)
+        self.published += 1
+
+    async def subscribe(self, session_id: str, last_event_id: str | None = None, heartbeat: float | None = None):
+        state_key, messages_key = self._state_key(session_id), self._messages_key(session_id)
+        cursor = await self.redis.hget(state_key, "cursor")
+        if cursor is None:
+            return
+        if last_event_id is not None and STREAM_ID.fullmatch(last_event_id):
+            cursor = last_event_id
+
+        block_ms = int(1000 * heartbeat) if heartbeat else self.block_ms
+
+        self.streams += 1
+        try:
+            while True:
+                result = await self.redis.xread({messages_key: cursor}, count=100, block=block_ms)
+                if not result:
+                    if not await self.redis.exists(state_key):     # expired or evicted
+                        return
+                    await self._expire(session_id, self.ttl)       # a connected stream keeps its session alive
+                    if heartbeat:
+                        yield None
+                    continue
+
+                for message_id, fields in result[0][1]:
+                    # Marked as delivered before it is sent, like in the in-process backend.
+                    cursor = message_id
+                    await self.redis.hset(state_key, "cursor", cursor)
+                    self.delivered += 1
+                    yield message_id, fields["message"]
+        finally:
+            self.streams -= 1
+            try:
+                await self._expire(session_id, self.disconnect_ttl)
+            except Exception as e:
+                print(f"[{session_id}] Failed to set the disconnect TTL: {e!r}")
+
+    def stats(self) -> dict:
+        # Counters of this worker; the number of sessions lives in Redis.
+        return {"streams": self.streams, "published": self.published, "delivered": self.delivered}
+
+    async def close(self):
+        await self.redis.aclose()
+
+def create_session_backend(on_evict=None) -> SessionBackend:
+    """
+    Creates the backend selected by SESSION_BACKEND: "memory" (default, single worker) or "redis" (REDIS_URL).
+    on_evict(session) is only supported by the in-process backend; Redis expires sessions by itself.
+    """
+    if SESSION_BACKEND == "memory":
+        return InProcessSessionBackend(on_evict)
+
+    if SESSION_BACKEND == "redis":
+        if REDIS_URL == "local":
+            from local_redis import LocalRedis
+            return RedisSessionBackend(LocalRedis())
+
+        # pip install redis
+        import redis.asyncio
+        return RedisSessionBackend(redis.asyncio.from_url(REDIS_URL, decode_responses=True))
+
+    raise ValueError(f"Unknown SESSION_BACKEND {SESSION_BACKEND!r} (expected memory or redis).")
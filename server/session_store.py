@@ -0,0 +1,187 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict, deque
+
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "3600"))
+SESSION_DISCONNECT_TTL = float(os.environ.get("SESSION_DISCONNECT_TTL", "300"))
+SESSION_MAX = int(os.environ.get("SESSION_MAX", "10000"))
+SESSION_QUEUE_SIZE = int(os.environ.get("SESSION_QUEUE_SIZE", "256"))
+SESSION_QUEUE_OVERFLOW = os.environ.get("SESSION_QUEUE_OVERFLOW", "drop_oldest")
+SESSION_REPLAY_SIZE = int(os.environ.get("SESSION_REPLAY_SIZE", "64"))
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+class Session:
+    """
+    Per-session bridge state: the messages for /stream and the state dict kept by the session backend.
+
+    Messages get increasing ids and are kept in one log: up to queue_size messages not yet delivered to a /stream client,
+    followed by a replay ring of the last replay_size delivered ones, so a client reconnecting with Last-Event-ID
+    gets back what it missed. A new /stream connection without Last-Event-ID continues after the last delivered message.
+
+    When queue_size messages are waiting, "drop_oldest" skips the oldest of them (a client that is not reading keeps
+    getting the latest state), "drop_newest" discards the new message.
+    """
+
+    def __init__(self, session_id: str, queue_size: int, overflow: str, replay_size: int = SESSION_REPLAY_SIZE):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r} (expected one of {', '.join(OVERFLOW_POLICIES)}).")
+
+        self.id = session_id
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.overflow = overflow
+        self.dropped = 0
+
+        self.log = deque()          # (id, message), ids increasing
+        self.last_id = 0            # id of the last message put
+        self.delivered = 0          # id of the last message taken by a /stream client
+        self.closed = False
+        self._changed = asyncio.Event()
+
+        self.state = {}
+
+        self.streams = 0            # connected /stream clients
+        self.last_seen = time.monotonic()
+        self.disconnected = False   # the last /stream client went away; the session then expires after SESSION_DISCONNECT_TTL
+
+    @property
+    def pending(self) -> int:
+        return self.last_id - self.delivered
+
+    def put(self, message: str):
+        if self.pending >= self.queue_size:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return
+            self.delivered += 1     # skipped, but still in the replay ring
+
+        self.last_id += 1
+        self.log.append((self.last_id, message))
+        self._trim()
+        self._notify()
+
+    def ack(self, message_id: int):
+        """Marks every message up to message_id as delivered."""
+        if message_id > self.delivered:
+            self.delivered = message_id
+            self._trim()
+
+    def read(self, after: int) -> list:
+        """Messages with an id greater than after, oldest first."""
+        if not self.log or self.log[-1][0] <= after:
+            return []
+        start = max(0, after - self.log[0][0] + 1)      # ids are consecutive
+        return [self.log[i] for i in range(start, len(self.log))]
+
+    async def wait(self, after: int, timeout: float | None = None) -> bool:
+        """Waits until there is a message after the given id or the session is closed; False on timeout."""
+        while self.last_id <= after and not self.closed:
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def _trim(self):
+        while self.log and self.log[0][0] <= self.delivered - self.replay_size:
+            self.log.popleft()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def close(self):
+        """Wakes up connected /stream clients so that they end."""
+        self.closed = True
+        self.log.clear()
+        self._notify()
+
+class SessionStore:
+    """
+    Sessions with idle-TTL and max-size eviction, least recently used first.
+
+    A session expires after ttl seconds without activity, or after disconnect_ttl seconds once its last /stream
+    client has disconnected. Sessions with a connected /stream client do not expire, but can still be evicted
+    when maxsize is reached. on_evict(session) is called for every session removed by eviction.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, disconnect_ttl: float = SESSION_DISCONNECT_TTL, maxsize: int = SESSION_MAX,
+                 queue_size: int = SESSION_QUEUE_SIZE, overflow: str = SESSION_QUEUE_OVERFLOW, on_evict=None):
+        self.ttl = ttl
+        self.disconnect_ttl = disconnect_ttl
+        self.maxsize = maxsize
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.on_evict = on_evict
+
+        self.expired = 0
+        self.evicted = 0
+        self._sessions = OrderedDict()      # least recently used first
+
+    def create(self, session_id: str) -> Session:
+        session = Session(session_id, self.queue_size, self.overflow)
+        self._sessions[session_id] = session
+
+        while len(self._sessions) > self.maxsize:
+            _, oldest = self._sessions.popitem(last=False)
+            self.evicted += 1
+            self._evict(oldest)
+
+        return session
+
+    def get(self, session_id: str) -> Session | None:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def connect(self, session: Session):
+        session.streams += 1
+        session.disconnected = False
+        session.touch()
+
+    def disconnect(self, session: Session):
+        session.streams -= 1
+        session.disconnected = session.streams == 0
+        session.touch()
+
+    def evict_expired(self) -> int:
+        now = time.monotonic()
+        expired = [
+            session for session in self._sessions.values()
+            if session.streams == 0 and now - session.last_seen > (self.disconnect_ttl if session.disconnected else self.ttl)
+        ]
+
+        for session in expired:
+            del self._sessions[session.id]
+            self.expired += 1
+            self._evict(session)
+
+        return len(expired)
+
+    def _evict(self, session: Session):
+        session.close()
+        if self.on_evict:
+            self.on_evict(session)
+
+    def stats(self) -> dict:
+        sessions = self._sessions.values()
+        return {
+            "sessions": len(self._sessions),
+            "streams": sum(session.streams for session in sessions),
+            "queued_messages": sum(session.pending for session in sessions),
+            "replay_messages": sum(len(session.log) - session.pending for session in sessions),
+            "dropped_messages": sum(session.dropped for session in sessions),
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
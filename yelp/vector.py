@@ -1,20 +1,97 @@
 import os
 import json
+import time
+import hashlib
+import argparse
 
-input_json_file_path = os.path.join(os.path.dirname(__file__), "restaurant_desc.json")
-with open(input_json_file_path, 'r', encoding='utf-8') as file:
-    restaurants = json.load(file)
+from vector_store import VectorStore, VectorStoreWriter, HEADER_FILE
 
-from sentence_transformers import SentenceTransformer
-model = SentenceTransformer("Qwen/Qwen3-Embedding-0.6B")
+MODEL_NAME = "Qwen/Qwen3-Embedding-0.6B"
 
-for count, restaurant in enumerate(restaurants, start=1):
-    print(f"Processing restaurant {count}: {restaurant["id"]}")
-    restaurant["vector"] = model.encode(restaurant["description"]).tolist()
+base_dir = os.path.dirname(__file__)
+input_json_file_path = os.path.join(base_dir, "restaurant_desc.json")
+output_store_path = os.path.join(base_dir, "restaurant_vectors")
 
-for restaurant in restaurants:
-    restaurant.pop("description", None)
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-output_json_file_path = os.path.join(os.path.dirname(__file__), "restaurant_vector.json")
-with open(output_json_file_path, 'w', encoding='utf-8') as outfile:
-    json.dump(restaurants, outfile, ensure_ascii=False, indent=2)
+def encode_all(model, texts, rows, batch_size, workers, writer):
+    """
+    Encodes texts in batches (optionally across several worker processes) and reports progress and throughput.
+    Each encoded chunk is written straight to the vector store writer, texts[i] going to row rows[i].
+    """
+    pool = model.start_multi_process_pool(target_devices=["cpu"] * workers) if workers > 1 else None
+
+    # Hand the model a few batches per worker at a time, so progress can be reported in between.
+    chunk_size = batch_size * max(workers, 1) * 4
+    start = time.perf_counter()
+    try:
+        for offset in range(0, len(texts), chunk_size):
+            chunk = texts[offset:offset + chunk_size]
+            if pool is not None:
+                vectors = model.encode_multi_process(chunk, pool, batch_size=batch_size)
+            else:
+                vectors = model.encode(chunk, batch_size=batch_size, convert_to_numpy=True)
+            writer.write(rows[offset:offset + len(chunk)], vectors)
+
+            done = offset + len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"Encoded {done}/{len(texts)} descriptions ({done / elapsed:.1f} texts/s)")
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    elapsed = time.perf_counter() - start
+    print(f"Encoded {len(texts)} descriptions in {elapsed:.1f}s ({len(texts) / max(elapsed, 1e-9):.1f} texts/s)")
+
+def load_previous_store():
+    """Returns the existing vector store if its vectors can be reused, otherwise None."""
+    if not os.path.exists(os.path.join(output_store_path, HEADER_FILE)):
+        return None
+
+    store = VectorStore(output_store_path)
+    if store.model != MODEL_NAME or store.hashes is None:
+        print("Existing vector store was built with another model or without text hashes; re-encoding everything.")
+        return None
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed restaurant descriptions into a memory-mapped vector store.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Number of descriptions encoded per model call.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of encoding processes (1 = encode in this process).")
+    parser.add_argument("--incremental", action="store_true", help="Reuse vectors of descriptions that did not change since the last run.")
+    args = parser.parse_args()
+
+    with open(input_json_file_path, 'r', encoding='utf-8') as file:
+        restaurants = json.load(file)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(MODEL_NAME)
+
+    ids = [restaurant["id"] for restaurant in restaurants]
+    hashes = [text_hash(restaurant["description"]) for restaurant in restaurants]
+    writer = VectorStoreWriter(output_store_path, ids, model.get_sentence_embedding_dimension(), MODEL_NAME, hashes)
+
+    previous = load_previous_store() if args.incremental else None
+    reused_rows, reused_vectors, changed_rows = [], [], []
+    for row, (restaurant_id, digest) in enumerate(zip(ids, hashes)):
+        previous_row = previous.index.get(restaurant_id) if previous is not None else None
+        if previous_row is not None and previous.hashes[previous_row] == digest:
+            reused_rows.append(row)
+            reused_vectors.append(previous_row)
+        else:
+            changed_rows.append(row)
+
+    # Copy in blocks, so reused vectors are never all in memory at once.
+    for offset in range(0, len(reused_rows), 4096):
+        writer.write(reused_rows[offset:offset + 4096], previous.vectors[reused_vectors[offset:offset + 4096]])
+    if reused_rows:
+        print(f"Reused {len(reused_rows)} unchanged vectors")
+    previous = None
+
+    texts = [restaurants[row]["description"] for row in changed_rows]
+    encode_all(model, texts, changed_rows, args.batch_size, args.workers, writer)
+    writer.close()
+
+if __name__ == "__main__":
+    main()
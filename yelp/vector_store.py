@@ -0,0 +1,121 @@
+import os
+import json
+import shutil
+
+import numpy as np
+
+# On-disk layout of a vector store directory:
+#   header.json  - {"version", "model", "dim", "count", "dtype"}
+#   ids.json     - restaurant id of each row, in row order
+#   hashes.json  - (optional) hash of the text each row was encoded from, in row order
+#   vectors.npy  - float32 matrix of shape (count, dim), opened memory-mapped
+FORMAT_VERSION = 1
+
+HEADER_FILE = "header.json"
+IDS_FILE = "ids.json"
+HASHES_FILE = "hashes.json"
+VECTORS_FILE = "vectors.npy"
+
+class VectorStoreWriter:
+    """
+    Writes a vector store row block by row block, so the full matrix never has to be held in memory.
+    The store is built in a temporary directory and only replaces `path` when `close()` succeeds.
+
+    Args:
+        path (str): Directory of the vector store.
+        ids (list[str]): Restaurant id of each row, in row order.
+        dim (int): Vector dimension.
+        model (str): Name of the embedding model that produced the vectors.
+        hashes (list[str], optional): Hash of the text each row was encoded from, used for incremental re-embedding.
+    """
+
+    def __init__(self, path: str, ids: list[str], dim: int, model: str, hashes: list[str] | None = None):
+        self.path = path
+        self.ids = list(ids)
+        self.dim = dim
+        self.model = model
+        self.hashes = list(hashes) if hashes is not None else None
+
+        self._tmp_path = path + ".tmp"
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        os.makedirs(self._tmp_path)
+
+        self._vectors = np.lib.format.open_memmap(
+            os.path.join(self._tmp_path, VECTORS_FILE), mode="w+", dtype=np.float32, shape=(len(self.ids), dim)
+        )
+
+    def write(self, rows: slice | list[int], vectors):
+        """Writes vectors into the given rows (a slice or a list of row numbers)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got shape {vectors.shape}.")
+        self._vectors[rows] = vectors
+
+    def close(self):
+        self._vectors.flush()
+        del self._vectors
+
+        with open(os.path.join(self._tmp_path, IDS_FILE), 'w', encoding='utf-8') as file:
+            json.dump(self.ids, file, ensure_ascii=False)
+
+        if self.hashes is not None:
+            with open(os.path.join(self._tmp_path, HASHES_FILE), 'w', encoding='utf-8') as file:
+                json.dump(self.hashes, file)
+
+        header = {
+            "version": FORMAT_VERSION,
+            "model": self.model,
+            "dim": self.dim,
+            "count": len(self.ids),
+            "dtype": "float32",
+        }
+        with open(os.path.join(self._tmp_path, HEADER_FILE), 'w', encoding='utf-8') as file:
+            json.dump(header, file, indent=2)
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self._tmp_path, self.path)
+
+class VectorStore:
+    """
+    Read-only view of a vector store. Vectors are memory-mapped, so rows and slices are read zero-copy on demand.
+
+    Args:
+        path (str): Directory of the vector store.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, HEADER_FILE), 'r', encoding='utf-8') as file:
+            header = json.load(file)
+
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector store version {header.get('version')} (expected {FORMAT_VERSION}).")
+
+        self.path = path
+        self.model = header["model"]
+        self.dim = header["dim"]
+
+        with open(os.path.join(path, IDS_FILE), 'r', encoding='utf-8') as file:
+            self.ids = json.load(file)
+        self.index = {id: row for row, id in enumerate(self.ids)}
+
+        self.hashes = None
+        hashes_path = os.path.join(path, HASHES_FILE)
+        if os.path.exists(hashes_path):
+            with open(hashes_path, 'r', encoding='utf-8') as file:
+                self.hashes = json.load(file)
+
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        if self.vectors.shape != (header["count"], self.dim) or len(self.ids) != header["count"] \
+                or (self.hashes is not None and len(self.hashes) != header["count"]):
+            raise ValueError(f"Vector store at {path} does not match its header.")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id: str):
+        return id in self.index
+
+    def get(self, id: str):
+        """Returns the vector of a restaurant id as a read-only float32 view, or None if it is not in the store."""
+        row = self.index.get(id)
+        return None if row is None else self.vectors[row]